@@ -0,0 +1,163 @@
+"""End-to-end rerun latency of the intern and admin dashboards.
+
+Drives main.py headlessly with streamlit.testing's AppTest: logs in as a
+seeded intern or the bench admin and replays typical interactions. Intern
+sessions open a subject, pick a day, verify, go to the next question and
+reverify. Admin sessions load the dashboard and rerun it. Every interaction
+is one AppTest run (including any st.rerun it triggers), timed end to end
+with its MongoDB command count and rendered element count, and reported as
+percentiles per interaction.
+
+Verifies questions, so it only runs against a scratch database seeded by
+benchmarks.generate_data:
+
+    DB_NAME=qbank_bench python -m benchmarks.bench_dashboard_reruns --role intern --sessions 10
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from benchmarks.command_counter import counter  # before the MongoClient exists
+from benchmarks.common import require_scratch_database, percentiles
+from benchmarks.generate_data import BENCH_ADMIN, INTERN_PASSWORD
+from config.database import get_collection
+from streamlit.testing.v1 import AppTest
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "main.py")
+
+def count_elements(node):
+    """Number of rendered elements below an AppTest tree node."""
+    children = getattr(node, "children", None)
+    if not children:
+        return 1
+    return sum(count_elements(child) for child in children.values())
+
+def find_button(at, key_prefix=None, label=None):
+    """First enabled button matching a key prefix and/or label, or None."""
+    for button in at.button:
+        if button.disabled:
+            continue
+        if key_prefix and not (button.key or "").startswith(key_prefix):
+            continue
+        if label and button.label != label:
+            continue
+        return button
+    return None
+
+class RerunRecorder:
+    """Collect wall time, query count and element count per named interaction."""
+    def __init__(self):
+        self.samples = {}
+
+    def run(self, name, at, action=None):
+        """Apply action (a widget interaction) and time the resulting script run."""
+        if action is not None:
+            action()
+        counter.reset()
+        start = time.perf_counter()
+        at.run()
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        if at.exception:
+            raise RuntimeError(f"{name}: {at.exception[0].value}")
+        self.samples.setdefault(name, []).append({
+            "ms": elapsed_ms, "queries": counter.count, "elements": count_elements(at.main)
+        })
+        return at
+
+    def summary(self):
+        """Percentiles of each metric per interaction, in first-seen order."""
+        result = {}
+        for name, samples in self.samples.items():
+            result[name] = {
+                "runs": len(samples),
+                "ms": percentiles([s["ms"] for s in samples]),
+                "queries": percentiles([s["queries"] for s in samples]),
+                "elements": percentiles([s["elements"] for s in samples]),
+            }
+        return result
+
+def login(recorder, username, password):
+    """Start a fresh session and submit the login form."""
+    at = AppTest.from_file(APP_PATH, default_timeout=60)
+    recorder.run("first load", at)
+    at.text_input(key="login_username").input(username)
+    at.text_input(key="login_password").input(password)
+    return recorder.run("login", at, find_button(at, label="Login").click)
+
+def intern_session(recorder, username, subject):
+    """Open subject, pick a day, verify, next, then reverify one question."""
+    at = login(recorder, username, INTERN_PASSWORD)
+
+    recorder.run("open subject", at, at.button(key=f"start_{subject}").click)
+    day_button = find_button(at, key_prefix="start_day-")
+    if not day_button:
+        print(f"  no open day left in {subject}; skipping verify steps")
+        return
+    recorder.run("pick day", at, day_button.click)
+
+    verify_button = find_button(at, key_prefix="verify_", label="✅ Verify")
+    if verify_button:
+        recorder.run("verify", at, verify_button.click)
+    next_button = find_button(at, label="➡️ Next")
+    if next_button:
+        recorder.run("next", at, next_button.click)
+
+    recorder.run("back to dashboard", at, at.button(key=f"back_{subject}").click)
+    recorder.run("home", at, find_button(at, label="🏠 Back to Dashboard").click)
+    recorder.run("open reverify", at, at.button(key=f"reverify_{subject}").click)
+    reverify_day = find_button(at, key_prefix="reverify_day-")
+    if reverify_day:
+        recorder.run("pick reverify day", at, reverify_day.click)
+        reverify_button = find_button(at, key_prefix="reverify_", label="🔄 Re-verify")
+        if reverify_button:
+            recorder.run("reverify", at, reverify_button.click)
+
+def admin_session(recorder, reruns):
+    """Load the admin dashboard and rerun it as a refresh would."""
+    at = login(recorder, BENCH_ADMIN["username"], BENCH_ADMIN["password"])
+    for _ in range(reruns):
+        recorder.run("admin rerun", at)
+
+def pick_intern(subject):
+    """A seeded intern with the subject allocated."""
+    intern = get_collection("users").find_one(
+        {"role": "intern", "allocated_subjects": subject, "password": INTERN_PASSWORD}, {"username": 1})
+    if not intern:
+        raise SystemExit(f"No bench intern has {subject} allocated; run benchmarks.generate_data first.")
+    return intern["username"]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--role", choices=["intern", "admin", "both"], default="both")
+    parser.add_argument("--subject", default="python")
+    parser.add_argument("--sessions", type=int, default=5)
+    parser.add_argument("--admin-reruns", type=int, default=3)
+    parser.add_argument("--output", help="write JSON results to this file")
+    parser.add_argument("--force", action="store_true", help="allow a DB_NAME without 'bench'")
+    args = parser.parse_args()
+    if not require_scratch_database():
+        return 1
+
+    recorder = RerunRecorder()
+    for session in range(args.sessions):
+        print(f"Session {session + 1}/{args.sessions}")
+        if args.role in ("intern", "both"):
+            intern_session(recorder, pick_intern(args.subject), args.subject)
+        if args.role in ("admin", "both"):
+            admin_session(recorder, args.admin_reruns)
+
+    summary = recorder.summary()
+    print(f"\n{'interaction':<20} {'runs':>4} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'queries':>8} {'elements':>8}")
+    for name, stats in summary.items():
+        print(f"{name:<20} {stats['runs']:>4} {stats['ms']['p50']:>8.1f} {stats['ms']['p95']:>8.1f} "
+              f"{stats['ms']['p99']:>8.1f} {stats['queries']['p50']:>8} {stats['elements']['p50']:>8}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(summary, f, indent=2)
+        print(f"\nResults written to {args.output}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,69 @@
+"""Micro-benchmark: MongoDB round trips needed to locate a question for verify.
+
+Compares the old probe-every-collection loop with the path verify_question
+takes now: resolve_question_subject (skipped when the view passes the
+subject; cold and warm LRU otherwise) followed by the single targeted
+lookup. The lookup is issued as a find_one with verify's own filter so the
+benchmark stays read-only. Run against a database that already holds
+questions:
+
+    MONGO_URI=mongodb://localhost:27017 python -m benchmarks.bench_question_lookup
+"""
+import sys
+import time
+from benchmarks.command_counter import counter  # before the MongoClient exists
+from bson import ObjectId
+from config.database import get_collection
+from services.db_service import DatabaseService, _question_subjects, _unverified_filter
+from utils.constants import SUBJECTS
+
+def legacy_lookup(question_id):
+    """Pre-change behaviour: probe each subject collection in order."""
+    for subject_name in SUBJECTS.values():
+        question = get_collection(f"{subject_name}_mcq").find_one({"_id": ObjectId(question_id)})
+        if question:
+            return question
+    return None
+
+def verify_lookup(db_service, question_id, subject=None):
+    """verify_question's lookup: resolve the subject if needed, then one query with its filter."""
+    subject = subject or db_service.resolve_question_subject(question_id)
+    if not subject:
+        return None
+    return get_collection(f"{subject}_mcq").find_one(_unverified_filter(question_id), {"Q_id": 1, "day": 1})
+
+def sample_questions(per_subject):
+    """Pick a few question ids from every subject collection."""
+    samples = []
+    for subject_name in SUBJECTS.values():
+        for doc in get_collection(f"{subject_name}_mcq").find({}, {"_id": 1}).limit(per_subject):
+            samples.append((str(doc["_id"]), subject_name))
+    return samples
+
+def measure(label, lookup, samples):
+    """Run lookup over samples and print round trips and wall time."""
+    counter.reset()
+    start = time.perf_counter()
+    for question_id, subject in samples:
+        lookup(question_id, subject)
+    elapsed = time.perf_counter() - start
+    per_lookup = counter.count / len(samples)
+    print(f"{label:<28} {counter.count:>7} round trips  {per_lookup:>6.2f}/lookup  {elapsed * 1000:>9.1f} ms")
+
+def main(per_subject=5):
+    db_service = DatabaseService()
+    samples = sample_questions(per_subject)
+    if not samples:
+        print("No questions found; seed the database first.")
+        return
+    
+    print(f"{len(samples)} questions across {len(SUBJECTS)} subject collections\n")
+    measure("before: probe all subjects", lambda qid, subject: legacy_lookup(qid), samples)
+    measure("after: subject passed", lambda qid, subject: verify_lookup(db_service, qid, subject), samples)
+    _question_subjects.clear()
+    # A cold resolve sends one probe per subject, but concurrently (one round trip of latency)
+    measure("after: resolver (cold LRU)", lambda qid, subject: verify_lookup(db_service, qid), samples)
+    measure("after: resolver (warm LRU)", lambda qid, subject: verify_lookup(db_service, qid), samples)
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
@@ -0,0 +1,126 @@
+"""Benchmark: MongoDB commands per verification, before and after.
+
+"Before" replays the original verify sequence (is_question_verified, probing
+subject collections, the audit-scan Q_id generator, update_one and a $push
+audit write), all sequential. "After" is DatabaseService.verify_question:
+counter $inc and the conditional find_one_and_update, then the catalog $inc,
+day version $inc, audit insert and progress $inc sent concurrently, so 6
+commands in 3 sequential round trips. "Stale" verifies the same questions
+again, as a stale working-set view would: counter $inc, the failing
+find_one_and_update, the gap $inc and a find_one for the message. Each flow
+also reports how many Q_id numbers it reserved without assigning them (one
+per stale verify, each recorded as a counter gap).
+
+Writes test data, so it only runs against a scratch database:
+
+    DB_NAME=qbank_bench python -m benchmarks.bench_verify_round_trips [count] [subject]
+"""
+import sys
+import time
+from benchmarks.command_counter import counter  # before the MongoClient exists
+from benchmarks.common import require_scratch_database
+from bson import ObjectId
+from datetime import datetime
+from config.database import get_collection
+from services.db_service import DatabaseService
+from utils.constants import SUBJECTS, SUBJECT_CODES
+
+BENCH_INTERN = "BENCH_VERIFY"
+
+def legacy_verify(question_id, subject):
+    """Replay of the original verify flow's database calls."""
+    source = get_collection(f"{subject}_mcq")
+    audit_collection = get_collection("audit_collection")
+    
+    # View: is_question_verified
+    source.find_one({"_id": ObjectId(question_id)})
+    
+    # verify_question: probe subjects in order until found
+    for subject_name in SUBJECTS.values():
+        question = get_collection(f"{subject_name}_mcq").find_one({"_id": ObjectId(question_id)})
+        if question:
+            break
+    
+    # generate_qid: scan every audit document
+    prefix = f"{SUBJECT_CODES[subject]}M"
+    max_number = 0
+    for intern_doc in audit_collection.find({}):
+        for activity in intern_doc.get("verified_modified_activities", []):
+            qid = str(activity.get("question_id", ""))
+            if qid.startswith(prefix) and qid[len(prefix):].isdigit():
+                max_number = max(max_number, int(qid[len(prefix):]))
+    q_id = f"{prefix}{max_number + 1:03d}"
+    
+    source.update_one({"_id": ObjectId(question_id)}, {"$set": {"Q_id": q_id}})
+    audit_collection.update_one(
+        {"intern_id": BENCH_INTERN},
+        {"$push": {"verified_modified_activities": {
+            "question_id": q_id, "action": "verified", "timestamp": datetime.now()
+        }}},
+        upsert=True
+    )
+
+def seed_questions(db_service, subject, count):
+    """Insert unverified benchmark questions and return their ids."""
+    questions = [{
+        "Question": f"Benchmark question {i}",
+        "Options": {"A": "1", "B": "2", "C": "3", "D": "4"},
+        "Correct_Option": "A",
+        "Tags": f"day-999:{i}",
+        "benchmark": True
+    } for i in range(1, count + 1)]
+    db_service.ingest_questions(subject, questions)
+    return [str(q["_id"]) for q in get_collection(f"{subject}_mcq").find({"benchmark": True}, {"_id": 1})]
+
+def counter_seq(prefix):
+    """Current value of a Q_id counter (0 if it does not exist yet)."""
+    doc = get_collection("qid_counters").find_one({"_id": prefix}, {"seq": 1})
+    return doc.get("seq", 0) if doc else 0
+
+def measure(label, verify, question_ids, prefix):
+    """Run verify for each id and print commands and wasted Q_id numbers per verification."""
+    seq_before = counter_seq(prefix)
+    counter.reset()
+    start = time.perf_counter()
+    results = [verify(question_id) for question_id in question_ids]
+    elapsed = time.perf_counter() - start
+    per_verify = counter.count / len(question_ids)
+    detail = ", ".join(f"{name}={n}" for name, n in sorted(counter.by_command.items()))
+    # Numbers the counter handed out beyond the Q_ids actually assigned
+    assigned = sum(1 for result in results if result and result[0] and "verified as" in result[1])
+    wasted = counter_seq(prefix) - seq_before - assigned
+    print(f"{label:<8} {per_verify:>6.2f} commands/verify  {elapsed / len(question_ids) * 1000:>7.2f} ms/verify  "
+          f"{wasted:>4} wasted Q_ids  ({detail})")
+
+def cleanup(subject):
+    """Remove benchmark questions and audit records."""
+    get_collection(f"{subject}_mcq").delete_many({"benchmark": True})
+    get_collection("audit_collection").delete_many({"intern_id": BENCH_INTERN})
+    get_collection("audit_events").delete_many({"intern_id": BENCH_INTERN})
+    get_collection("progress_counters").delete_many({"intern_id": BENCH_INTERN})
+
+def main(count=50, subject="softskills"):
+    if not require_scratch_database():
+        return 1
+    
+    db_service = DatabaseService()
+    cleanup(subject)
+    try:
+        question_ids = seed_questions(db_service, subject, count * 2)
+        before_ids, after_ids = question_ids[:count], question_ids[count:]
+        
+        prefix = f"{SUBJECT_CODES[subject]}M"
+        verify = lambda qid: db_service.verify_question(qid, BENCH_INTERN, subject=subject)
+        
+        print(f"{count} verifications per flow on {subject}_mcq\n")
+        # The legacy flow doesn't use the counter, so its wasted count is always 0
+        measure("before", lambda qid: legacy_verify(qid, subject), before_ids, prefix)
+        measure("after", verify, after_ids, prefix)
+        measure("stale", verify, after_ids, prefix)
+    finally:
+        cleanup(subject)
+    return 0
+
+if __name__ == "__main__":
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    sys.exit(main(int(args[0]) if args else 50, args[1] if len(args) > 1 else "softskills"))
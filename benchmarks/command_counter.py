@@ -0,0 +1,29 @@
+"""Shared pymongo command listener for round-trip benchmarks.
+
+Import this module before anything creates the MongoClient; pymongo only
+attaches globally registered listeners to clients created afterwards.
+"""
+from pymongo import monitoring
+
+class CommandCounter(monitoring.CommandListener):
+    """Count commands sent to the server, optionally by command name."""
+    def __init__(self):
+        self.count = 0
+        self.by_command = {}
+    
+    def reset(self):
+        self.count = 0
+        self.by_command = {}
+    
+    def started(self, event):
+        self.count += 1
+        self.by_command[event.command_name] = self.by_command.get(event.command_name, 0) + 1
+    
+    def succeeded(self, event):
+        pass
+    
+    def failed(self, event):
+        pass
+
+counter = CommandCounter()
+monitoring.register(counter)
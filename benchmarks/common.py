@@ -0,0 +1,15 @@
+"""Helpers shared by the benchmark and load-test scripts."""
+import os
+import sys
+from config.query_monitor import percentile
+
+def require_scratch_database():
+    """Refuse to write unless DB_NAME names a scratch database (or --force is passed)."""
+    if "bench" in os.getenv("DB_NAME", "") or "--force" in sys.argv:
+        return True
+    print("Refusing to write benchmark data: set DB_NAME to a scratch database containing 'bench' (or pass --force).")
+    return False
+
+def percentiles(samples, points=(50, 95, 99)):
+    """Nearest-rank percentiles of samples as {"p50": ..., ...} (None when empty)."""
+    return {f"p{pct}": percentile(samples, pct) for pct in points}
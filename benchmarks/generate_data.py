@@ -0,0 +1,203 @@
+"""Generate a synthetic question bank for benchmarks.
+
+Builds all 14 {subject}_mcq collections with day-tagged questions (a share of
+them already verified with sequential Q_ids), intern and admin users, and an
+audit_events history consistent with the verified questions. Derived data
+(Q_id counters, progress counters) is rebuilt afterwards so the database
+looks like one the app has been running against. Deterministic for a given
+--seed.
+
+Writes data, so it only runs against a scratch database:
+
+    DB_NAME=qbank_bench python -m benchmarks.generate_data --questions 500000 --interns 300 --audit-events 2000000
+"""
+import argparse
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from config.database import get_collection
+from config.indexes import ensure_indexes
+from benchmarks.common import require_scratch_database
+from services.db_service import DatabaseService
+from utils.constants import SUBJECTS, SUBJECT_CODES
+from utils.qid import format_qid
+from utils.tags import day_fields
+
+BENCH_ADMIN = {"user_id": "ADM_BENCH", "username": "bench_admin", "password": "bench", "name": "Bench Admin", "role": "admin"}
+INTERN_PASSWORD = "bench"
+DIFFICULTIES = ["Easy", "Medium", "Hard"]
+# Mix of audit actions beyond the one verify/modify event each verified question gets
+EXTRA_ACTIONS = [("reverified", 0.6), ("remodified", 0.25), ("viewed", 0.15)]
+
+def make_question(rng, subject, day, seq):
+    """One realistic MCQ document (options, explanations, optional image)."""
+    tag = f"day-{day}:{seq}"
+    question = {
+        "Question": f"[{subject}] {tag} " + " ".join(rng.choice(["what", "which", "how", "output", "value", "returns", "code", "function"]) for _ in range(rng.randint(12, 40))) + "?",
+        "Options": {key: f"Option {key} " + "x" * rng.randint(5, 60) for key in "ABCD"},
+        "Correct_Option": rng.choice("ABCD"),
+        "Explanation": "Because " + "y" * rng.randint(100, 600),
+        "Text_Explanation": "",
+        "Difficulty": rng.choice(DIFFICULTIES),
+        "Tags": tag,
+    }
+    if rng.random() < 0.1:
+        question["Image_URL"] = f"https://example.invalid/images/{subject}/{day}-{seq}.png"
+    question.update(day_fields(tag))
+    return question
+
+def insert_batches(collection, documents, batch_size):
+    """insert_many in fixed-size unordered batches; returns the number inserted."""
+    inserted = 0
+    batch = []
+    for document in documents:
+        batch.append(document)
+        if len(batch) >= batch_size:
+            inserted += len(collection.insert_many(batch, ordered=False).inserted_ids)
+            batch = []
+    if batch:
+        inserted += len(collection.insert_many(batch, ordered=False).inserted_ids)
+    return inserted
+
+def generate_users(rng, intern_count):
+    """Intern users with 1-3 allocated subjects each, plus one admin."""
+    subjects = list(SUBJECTS.values())
+    interns = []
+    for number in range(1, intern_count + 1):
+        interns.append({
+            "user_id": f"INT{number:03d}",
+            "username": f"bench_intern_{number}",
+            "password": INTERN_PASSWORD,
+            "name": f"Bench Intern {number}",
+            "role": "intern",
+            "email": f"bench_intern_{number}@example.invalid",
+            "allocated_subjects": rng.sample(subjects, rng.randint(1, 3)),
+            "created_at": datetime.now() - timedelta(days=rng.randint(30, 120)),
+            "last_allocation": datetime.now() - timedelta(days=rng.randint(0, 30)),
+            "status": "active"
+        })
+    get_collection("users").insert_many(interns + [dict(BENCH_ADMIN)])
+    return interns
+
+def generate_subject(rng, subject, count, per_day, verified_share, interns_by_subject, history_days, batch_size):
+    """Insert one subject's questions; returns the verify/modify audit events for verified ones."""
+    prefix = f"{SUBJECT_CODES[subject]}M"
+    candidates = interns_by_subject.get(subject) or ["INT001"]
+    now = datetime.now()
+    events = []
+    next_number = 0
+
+    def documents():
+        nonlocal next_number
+        for index in range(count):
+            question = make_question(rng, subject, index // per_day + 1, index % per_day + 1)
+            # Interns work through days in order, so earlier days are more likely verified
+            if rng.random() < verified_share * (1.5 if index < count * 0.6 else 0.25):
+                next_number += 1
+                question["Q_id"] = format_qid(prefix, next_number)
+                question["Q_num"] = next_number
+                action = "modified" if rng.random() < 0.2 else "verified"
+                events.append({
+                    "intern_id": rng.choice(candidates),
+                    "question_id": question["Q_id"],
+                    "subject": subject,
+                    "action": action,
+                    "timestamp": now - timedelta(days=rng.random() * history_days)
+                })
+            yield question
+
+    inserted = insert_batches(get_collection(f"{subject}_mcq"), documents(), batch_size)
+    print(f"  {subject}_mcq: {inserted} questions, {next_number} verified")
+    return events
+
+def generate_audit_events(rng, verify_events, target, history_days, batch_size):
+    """Write verify events plus reverify/remodify/other noise up to target events."""
+    now = datetime.now()
+    weights = [weight for _, weight in EXTRA_ACTIONS]
+    actions = [action for action, _ in EXTRA_ACTIONS]
+
+    def events():
+        yield from verify_events
+        for _ in range(max(0, target - len(verify_events))):
+            base = rng.choice(verify_events)
+            yield {
+                "intern_id": base["intern_id"],
+                "question_id": base["question_id"],
+                "subject": base["subject"],
+                "action": rng.choices(actions, weights)[0],
+                "timestamp": now - timedelta(days=rng.random() * history_days)
+            }
+
+    if not verify_events:
+        return 0
+    return insert_batches(get_collection("audit_events"), events(), batch_size)
+
+def generate(questions=50000, interns=200, audit_events=500000, per_day=30, verified_share=0.4,
+             history_days=90, seed=42, batch_size=5000, drop=False):
+    """Generate the whole dataset; returns a summary dict."""
+    rng = random.Random(seed)
+    start = time.perf_counter()
+    managed = [f"{subject}_mcq" for subject in SUBJECTS.values()] + [
+        "users", "audit_events", "progress_counters", "qid_counters", "day_versions", "idempotency_keys",
+        "subject_catalog", "subject_catalog_state", "dashboard_snapshots"
+    ]
+    if drop:
+        for name in managed:
+            get_collection(name).drop()
+        # Dropping a collection drops its indexes; get_database only ensures them once per process
+        ensure_indexes(get_collection("users").database)
+    elif get_collection("users").estimated_document_count():
+        print("Database already has users; pass --drop to regenerate.")
+        return None
+
+    intern_docs = generate_users(rng, interns)
+    interns_by_subject = {}
+    for intern in intern_docs:
+        for subject in intern["allocated_subjects"]:
+            interns_by_subject.setdefault(subject, []).append(intern["user_id"])
+    print(f"Users: {interns} interns + 1 admin ({BENCH_ADMIN['username']} / {BENCH_ADMIN['password']})")
+
+    # Skewed sizes: some subjects are much larger than others, like the real bank
+    subjects = list(SUBJECTS.values())
+    weights = [rng.uniform(0.3, 1.7) for _ in subjects]
+    verify_events = []
+    print("Questions:")
+    for subject, weight in zip(subjects, weights):
+        count = max(per_day, int(questions * weight / sum(weights)))
+        verify_events.extend(generate_subject(
+            rng, subject, count, per_day, verified_share, interns_by_subject, history_days, batch_size
+        ))
+
+    written = generate_audit_events(rng, verify_events, audit_events, history_days, batch_size)
+    print(f"Audit events: {written}")
+
+    # Derived state the app maintains incrementally
+    db_service = DatabaseService()
+    get_collection("qid_counters").drop()
+    db_service.seed_qid_counters()
+    db_service.rebuild_progress_counters()
+    db_service.reconcile_subject_catalog()
+
+    elapsed = time.perf_counter() - start
+    print(f"Done in {elapsed:.1f}s")
+    return {"questions": questions, "interns": interns, "audit_events": written,
+            "verified": len(verify_events), "seconds": elapsed}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--questions", type=int, default=50000, help="total questions across all subjects")
+    parser.add_argument("--interns", type=int, default=200)
+    parser.add_argument("--audit-events", type=int, default=500000)
+    parser.add_argument("--per-day", type=int, default=30, help="questions per day tag")
+    parser.add_argument("--verified-share", type=float, default=0.4)
+    parser.add_argument("--history-days", type=int, default=90)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--drop", action="store_true", help="drop existing benchmark collections first")
+    parser.add_argument("--force", action="store_true", help="allow a DB_NAME without 'bench'")
+    args = parser.parse_args()
+    if not require_scratch_database():
+        sys.exit(1)
+    generate(args.questions, args.interns, args.audit_events, args.per_day, args.verified_share,
+             args.history_days, args.seed, args.batch_size, args.drop)
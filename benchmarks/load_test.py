@@ -0,0 +1,245 @@
+"""Concurrent-intern load test for the verification workload.
+
+Simulates N interns calling DatabaseService verify, reverify and stats paths
+with exponential think times, either as threads in one process (like one
+Streamlit server) or spread over worker processes (like several servers).
+Interns sharing a subject pick from the same open day, so verify races are
+exercised. After the run it reports throughput and tail latency per
+operation, checks for duplicate Q_ids, and cross-checks questions, audit
+events and progress counters against the operations that succeeded.
+
+Writes data, so it only runs against a scratch database seeded by
+benchmarks.generate_data:
+
+    DB_NAME=qbank_bench python -m benchmarks.load_test --interns 50 --duration 60 --mode thread
+    DB_NAME=qbank_bench python -m benchmarks.load_test --interns 200 --duration 60 --mode process --processes 4
+"""
+import argparse
+import json
+import multiprocessing
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from datetime import datetime
+from benchmarks.common import require_scratch_database, percentiles
+from config.database import get_collection
+from services.db_service import DatabaseService
+
+OPERATIONS = ["verify", "reverify", "stats"]
+
+def pick_open_question(db_service, subject, rng):
+    """One of the first few open questions of the subject's first open day."""
+    days = [d for d in db_service.get_days_progress(subject) if d["remaining"] > 0]
+    if not days:
+        return None
+    summaries = db_service.get_day_question_summaries(subject, days[0]["day_number"])
+    # Interns on the same day tend to look at the same questions
+    return str(rng.choice(summaries[:5])["_id"]) if summaries else None
+
+def pick_verified_question(subject, rng):
+    """A random already-verified question of the subject."""
+    sample = list(get_collection(f"{subject}_mcq").aggregate([
+        {"$match": {"Q_id": {"$exists": True}}}, {"$sample": {"size": 1}}, {"$project": {"_id": 1}}
+    ]))
+    return str(sample[0]["_id"]) if sample else None
+
+def run_intern(intern_id, subject, duration, max_ops, think_ms, weights, seed):
+    """Simulate one intern; returns a list of operation samples."""
+    rng = random.Random(seed)
+    db_service = DatabaseService()
+    samples = []
+    deadline = time.monotonic() + duration
+
+    while time.monotonic() < deadline and len(samples) < max_ops:
+        time.sleep(rng.expovariate(1000 / think_ms) if think_ms else 0)
+        operation = rng.choices(OPERATIONS, weights)[0]
+        start = time.perf_counter()
+        sample = {"op": operation, "intern_id": intern_id, "subject": subject, "ok": True, "q_id": None}
+        try:
+            if operation == "verify":
+                question_id = pick_open_question(db_service, subject, rng)
+                if question_id is None:
+                    sample.update(ok=False, message="no open questions")
+                else:
+                    sample["ok"], sample["message"] = db_service.verify_question(question_id, intern_id, subject=subject)
+                    if sample["ok"]:
+                        # "Question verified as PYM123"
+                        sample["q_id"] = sample["message"].rsplit(" ", 1)[-1]
+            elif operation == "reverify":
+                question_id = pick_verified_question(subject, rng)
+                if question_id is not None:
+                    sample["ok"], sample["message"] = db_service.reverify_question(question_id, intern_id, subject=subject)
+            else:
+                db_service.get_intern_stats(intern_id)
+                db_service.get_intern_subject_stats(intern_id, subject)
+                db_service.get_days_progress(subject)
+        except Exception as e:
+            sample.update(ok=False, message=f"error: {type(e).__name__}: {e}")
+        sample["ms"] = (time.perf_counter() - start) * 1000
+        samples.append(sample)
+    return samples
+
+def run_process(worker_args):
+    """Run several interns as threads inside one worker process."""
+    with ThreadPoolExecutor(max_workers=len(worker_args)) as pool:
+        results = pool.map(lambda args: run_intern(*args), worker_args)
+        return [sample for samples in results for sample in samples]
+
+def progress_totals(intern_ids):
+    """Sum of each progress action over the given interns."""
+    totals = {"verified": 0, "reverified": 0}
+    for counter in get_collection("progress_counters").find({"intern_id": {"$in": intern_ids}}):
+        for action in totals:
+            totals[action] += counter.get(action, 0)
+    return totals
+
+def qid_gaps():
+    """Q_id numbers reserved by verifies that lost a race, summed over all prefixes."""
+    return sum(doc.get("gaps", 0) for doc in get_collection("qid_counters").find({}, {"gaps": 1}))
+
+def consistency_report(samples, intern_ids, started_at, progress_before, gaps_before):
+    """Check questions, audit events and counters against successful operations."""
+    verified = [s for s in samples if s["op"] == "verify" and s["ok"]]
+    reverified = [s for s in samples if s["op"] == "reverify" and s["ok"]]
+    subjects = sorted({s["subject"] for s in samples})
+    report = {}
+
+    # Two successes for one Q_id, or one Q_id stored on two questions
+    q_ids = [s["q_id"] for s in verified]
+    report["duplicate_qids_in_results"] = len(q_ids) - len(set(q_ids))
+    report["duplicate_qids_in_db"] = {
+        subject: [doc["_id"] for doc in get_collection(f"{subject}_mcq").aggregate([
+            {"$match": {"Q_id": {"$exists": True}}},
+            {"$group": {"_id": "$Q_id", "count": {"$sum": 1}}},
+            {"$match": {"count": {"$gt": 1}}}
+        ])]
+        for subject in subjects
+    }
+
+    # Every successful verify left its Q_id on a question and exactly one audit event
+    missing_questions = 0
+    for subject in subjects:
+        subject_qids = [s["q_id"] for s in verified if s["subject"] == subject]
+        found = get_collection(f"{subject}_mcq").count_documents({"Q_id": {"$in": subject_qids}})
+        missing_questions += len(subject_qids) - found
+    report["verified_without_question"] = missing_questions
+
+    audit_counts = {
+        doc["_id"]: doc["count"] for doc in get_collection("audit_events").aggregate([
+            {"$match": {"intern_id": {"$in": intern_ids}, "timestamp": {"$gte": started_at}}},
+            {"$group": {"_id": "$action", "count": {"$sum": 1}}}
+        ])
+    }
+    report["audit_verified"] = {"expected": len(verified), "found": audit_counts.get("verified", 0)}
+    report["audit_reverified"] = {"expected": len(reverified), "found": audit_counts.get("reverified", 0)}
+
+    progress_after = progress_totals(intern_ids)
+    report["progress_verified_delta"] = {
+        "expected": len(verified), "found": progress_after["verified"] - progress_before["verified"]
+    }
+    report["progress_reverified_delta"] = {
+        "expected": len(reverified), "found": progress_after["reverified"] - progress_before["reverified"]
+    }
+
+    # Informational: races burn numbers, which leaves gaps but no duplicates
+    report["qid_gaps"] = qid_gaps() - gaps_before
+    
+    report["consistent"] = (
+        report["duplicate_qids_in_results"] == 0
+        and not any(report["duplicate_qids_in_db"].values())
+        and missing_questions == 0
+        and all(report[key]["expected"] == report[key]["found"] for key in
+                ["audit_verified", "audit_reverified", "progress_verified_delta", "progress_reverified_delta"])
+    )
+    return report
+
+def throughput_report(samples, elapsed):
+    """Throughput, success rate and latency percentiles per operation."""
+    report = {}
+    for operation in OPERATIONS:
+        op_samples = [s for s in samples if s["op"] == operation]
+        if not op_samples:
+            continue
+        latencies = [s["ms"] for s in op_samples]
+        report[operation] = {
+            "count": len(op_samples),
+            "ok": sum(s["ok"] for s in op_samples),
+            "errors": sum(str(s.get("message", "")).startswith("error:") for s in op_samples),
+            "per_second": len(op_samples) / elapsed,
+            **{f"{key}_ms": value for key, value in percentiles(latencies).items()},
+            "max_ms": max(latencies),
+        }
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--interns", type=int, default=20, help="concurrent simulated interns")
+    parser.add_argument("--mode", choices=["thread", "process"], default="thread")
+    parser.add_argument("--processes", type=int, default=multiprocessing.cpu_count())
+    parser.add_argument("--duration", type=float, default=30, help="seconds per intern")
+    parser.add_argument("--max-ops", type=int, default=1000, help="operations per intern")
+    parser.add_argument("--think-ms", type=float, default=500, help="mean think time between operations")
+    parser.add_argument("--mix", default="6,2,2", help="verify,reverify,stats weights")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help="write JSON results to this file")
+    parser.add_argument("--force", action="store_true", help="allow a DB_NAME without 'bench'")
+    args = parser.parse_args()
+    if not require_scratch_database():
+        return 1
+
+    weights = [float(w) for w in args.mix.split(",")]
+    interns = list(get_collection("users").find(
+        {"role": "intern", "allocated_subjects.0": {"$exists": True}}, {"user_id": 1, "allocated_subjects": 1}
+    ).limit(args.interns))
+    if not interns:
+        print("No interns with allocations; run benchmarks.generate_data first.")
+        return 1
+
+    # More simulated interns than users reuse accounts, like one person in several tabs
+    worker_args = []
+    for index in range(args.interns):
+        intern = interns[index % len(interns)]
+        subject = intern["allocated_subjects"][index // len(interns) % len(intern["allocated_subjects"])]
+        worker_args.append((intern["user_id"], subject, args.duration, args.max_ops,
+                            args.think_ms, weights, args.seed + index))
+    intern_ids = sorted({a[0] for a in worker_args})
+
+    progress_before = progress_totals(intern_ids)
+    gaps_before = qid_gaps()
+    started_at = datetime.now()
+    start = time.perf_counter()
+    print(f"Running {args.interns} interns for {args.duration:.0f}s ({args.mode} mode)...")
+
+    if args.mode == "thread":
+        samples = run_process(worker_args)
+    else:
+        # spawn: each worker builds its own MongoClient instead of inheriting one across fork
+        chunks = [worker_args[i::args.processes] for i in range(args.processes) if worker_args[i::args.processes]]
+        with ProcessPoolExecutor(max_workers=len(chunks), mp_context=multiprocessing.get_context("spawn")) as pool:
+            samples = [sample for chunk in pool.map(run_process, chunks) for sample in chunk]
+    elapsed = time.perf_counter() - start
+
+    results = {
+        "config": {key: value for key, value in vars(args).items() if key != "output"},
+        "elapsed_s": elapsed,
+        "operations": throughput_report(samples, elapsed),
+        "consistency": consistency_report(samples, intern_ids, started_at, progress_before, gaps_before),
+    }
+
+    print(f"\n{'op':<10} {'count':>6} {'ok':>6} {'ops/s':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for operation, stats in results["operations"].items():
+        print(f"{operation:<10} {stats['count']:>6} {stats['ok']:>6} {stats['per_second']:>7.1f} {stats['p50_ms']:>8.1f} "
+              f"{stats['p95_ms']:>8.1f} {stats['p99_ms']:>8.1f} {stats['max_ms']:>8.1f}")
+    print("\nConsistency:")
+    for key, value in results["consistency"].items():
+        print(f"  {key}: {value}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2, default=str)
+        print(f"\nResults written to {args.output}")
+    return 0 if results["consistency"]["consistent"] else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,252 @@
+"""Time every public DatabaseService method and compare against a baseline.
+
+Runs each method a fixed number of times against the configured database,
+with the query cache cleared before every call (pass --warm to measure cached
+reads instead), and writes JSON results with latency percentiles and MongoDB
+round trips per call. With --baseline the run fails (exit code 1) when a
+method's median latency regresses beyond --threshold, it needs more round
+trips than before, or it ran in the baseline but now fails or is missing
+(methods left out on purpose with --only or --read-only are not counted).
+
+Write benchmarks verify questions and allocate subjects, so the dataset drifts
+between runs; regenerate it before recording a baseline you compare against.
+
+Against a local mongod seeded by benchmarks.generate_data:
+
+    DB_NAME=qbank_bench python -m benchmarks.run_benchmarks --output results.json
+    DB_NAME=qbank_bench python -m benchmarks.run_benchmarks --baseline results.json
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from datetime import datetime
+from benchmarks.command_counter import counter  # before the MongoClient exists
+from benchmarks.common import require_scratch_database, percentiles
+from config.database import get_collection
+from services.cache_service import query_cache
+from services.db_service import DatabaseService, _question_subjects
+from utils.constants import SUBJECT_CODES
+
+# Public methods that rewrite whole collections; timed by their own scripts instead
+SKIPPED = {
+    "backfill_day_fields": "one-off migration (scripts/backfill_day_fields.py)",
+    "seed_qid_counters": "one-off migration (scripts/seed_qid_counters.py)",
+    "rebuild_progress_counters": "maintenance rebuild (scripts/rebuild_progress_counters.py)",
+    "reconcile_subject_catalog": "maintenance rebuild (scripts/reconcile_subject_catalog.py)",
+    "reconcile_subject_catalog_if_due": "scheduled reconcile (dashboard snapshot worker)",
+    "get_cache_stats": "in-process only, no database access",
+    "clear_cache": "in-process only, no database access",
+}
+
+def build_context(db_service, subject, iterations):
+    """Pick the ids, day and intern the benchmark calls operate on."""
+    collection = get_collection(f"{subject}_mcq")
+    unverified = [doc["_id"] for doc in collection.find({"Q_id": {"$exists": False}}, {"_id": 1}).sort("day", 1).limit(20 + iterations)]
+    verified = [doc for doc in collection.find({"Q_id": {"$exists": True}}, {"_id": 1, "Q_id": 1}).limit(iterations)]
+    if len(unverified) < 20 or not verified:
+        raise SystemExit(f"{subject}_mcq needs verified and unverified questions; run benchmarks.generate_data first.")
+
+    first = collection.find_one({"_id": unverified[0]}, {"day": 1})
+    intern = get_collection("users").find_one({"role": "intern", "allocated_subjects": subject}, {"user_id": 1}) \
+        or get_collection("users").find_one({"role": "intern"}, {"user_id": 1})
+    if not intern:
+        raise SystemExit("No intern users found; run benchmarks.generate_data first.")
+
+    page = db_service.get_questions_page(subject, size=50)
+    return {
+        "subject": subject,
+        "day": first.get("day") or 1,
+        "intern_id": intern["user_id"],
+        "read_ids": unverified[:20],
+        # Each verify iteration consumes one fresh question
+        "verify_ids": [str(_id) for _id in unverified[20:20 + iterations]],
+        "verified_ids": [str(doc["_id"]) for doc in verified],
+        "page_key": page["last_key"],
+        "total": page["total"],
+    }
+
+def benchmark_cases(db_service, ctx, include_writes):
+    """Map method name -> callable(iteration) exercising it with realistic arguments."""
+    subject, day, intern_id = ctx["subject"], ctx["day"], ctx["intern_id"]
+    cases = {
+        "get_paginated_questions": lambda i: db_service.get_paginated_questions(subject, page=5, size=50),
+        "get_questions_page": lambda i: db_service.get_questions_page(subject, size=50, after=ctx["page_key"], total=ctx["total"]),
+        "get_day_questions": lambda i: db_service.get_day_questions(subject, day),
+        "get_available_days": lambda i: db_service.get_available_days(subject),
+        "get_day_stats": lambda i: db_service.get_day_stats(subject, day),
+        "get_days_progress": lambda i: db_service.get_days_progress(subject),
+        "get_day_question_summaries": lambda i: db_service.get_day_question_summaries(subject, day),
+        "get_questions_by_ids": lambda i: db_service.get_questions_by_ids(subject, ctx["read_ids"][:3], projection="editor"),
+        "get_day_version": lambda i: db_service.get_day_version(subject, day),
+        "resolve_question_subject": lambda i: (_question_subjects.clear(), db_service.resolve_question_subject(str(ctx["read_ids"][-1]))),
+        "get_intern_stats": lambda i: db_service.get_intern_stats(intern_id),
+        "get_subject_question_count": lambda i: db_service.get_subject_question_count(subject),
+        "get_verified_count": lambda i: db_service.get_verified_count(subject),
+        "get_verified_today_count": lambda i: db_service.get_verified_today_count(),
+        "get_all_interns": lambda i: db_service.get_all_interns(),
+        "get_top_interns": lambda i: db_service.get_top_interns(),
+        "get_overall_completion_rate": lambda i: db_service.get_overall_completion_rate(),
+        "get_current_allocations": lambda i: db_service.get_current_allocations(),
+        "get_allocation_report": lambda i: db_service.get_allocation_report(),
+        "get_subject_catalog": lambda i: db_service.get_subject_catalog(),
+        "get_intern_assignments": lambda i: db_service.get_intern_assignments(intern_id),
+        "get_intern_subject_stats": lambda i: db_service.get_intern_subject_stats(intern_id, subject),
+        "get_audit_logs": lambda i: db_service.get_audit_logs(intern=intern_id),
+        "get_first_unverified_question_index": lambda i: db_service.get_first_unverified_question_index(subject),
+        "is_question_verified": lambda i: db_service.is_question_verified(str(ctx["read_ids"][0]), subject),
+        "get_question_batch": lambda i: db_service.get_question_batch(subject),
+        "generate_verification_report": lambda i: db_service.generate_verification_report(subject),
+        "get_available_subjects": lambda i: db_service.get_available_subjects(),
+        "get_verified_subjects": lambda i: db_service.get_verified_subjects(),
+        "get_intern_allocated_subjects": lambda i: db_service.get_intern_allocated_subjects(intern_id),
+        "get_unallocated_subjects": lambda i: db_service.get_unallocated_subjects(),
+    }
+    if include_writes:
+        cases.update({
+            "verify_question": lambda i: db_service.verify_question(ctx["verify_ids"][i], intern_id, subject=subject),
+            "reverify_question": lambda i: db_service.reverify_question(ctx["verified_ids"][i % len(ctx["verified_ids"])], intern_id, subject=subject),
+            "generate_qid": lambda i: db_service.generate_qid(SUBJECT_CODES[subject], "M"),
+            "bulk_verify_clean_questions": lambda i: db_service.bulk_verify_clean_questions(subject, "mcq", 10, intern_id),
+            "allocate_questions": lambda i: db_service.allocate_questions(intern_id, [subject], {}),
+            "ingest_questions": lambda i: db_service.ingest_questions(subject, [
+                {"Question": f"Benchmark ingest {i}-{n}", "Options": {"A": "1", "B": "2", "C": "3", "D": "4"},
+                 "Correct_Option": "A", "Tags": f"day-9999:{i * 10 + n + 1}", "benchmark": True}
+                for n in range(10)
+            ]),
+            "create_intern_user": lambda i: db_service.create_intern_user(
+                f"Bench Created {i}", f"bench_created_{time.time_ns()}@example.invalid", [subject]),
+        })
+    return cases
+
+def run_case(call, iterations, warm):
+    """Time call over iterations; returns latency percentiles and round trips per call."""
+    timings = []
+    round_trips = 0
+    for i in range(iterations):
+        if not warm:
+            query_cache.clear()
+        counter.reset()
+        start = time.perf_counter()
+        call(i)
+        timings.append((time.perf_counter() - start) * 1000)
+        round_trips += counter.count
+    stats = percentiles(timings)
+    return {
+        "iterations": iterations,
+        "median_ms": stats["p50"],
+        "p95_ms": stats["p95"],
+        "p99_ms": stats["p99"],
+        "min_ms": min(timings),
+        "mean_ms": sum(timings) / len(timings),
+        "round_trips": round_trips / iterations,
+    }
+
+def compare(results, baseline, threshold, min_delta_ms):
+    """Return regression messages for methods slower, chattier, failing or missing against the baseline."""
+    regressions = []
+    excluded = set(results.get("excluded", []))
+    for name, base in baseline.get("methods", {}).items():
+        if "error" not in base and name not in results["methods"] and name not in excluded:
+            regressions.append(f"{name}: ran in the baseline but is missing from this run")
+
+    for name, result in results["methods"].items():
+        base = baseline.get("methods", {}).get(name)
+        if not base or "error" in base:
+            continue
+        if "error" in result:
+            regressions.append(f"{name}: now fails ({result['error']})")
+            continue
+        slower = result["median_ms"] - base["median_ms"]
+        if slower > min_delta_ms and result["median_ms"] > base["median_ms"] * (1 + threshold):
+            regressions.append(f"{name}: median {base['median_ms']:.2f} -> {result['median_ms']:.2f} ms "
+                               f"(+{slower / base['median_ms'] * 100:.0f}%)")
+        if result["round_trips"] > base["round_trips"]:
+            regressions.append(f"{name}: round trips {base['round_trips']:.1f} -> {result['round_trips']:.1f}")
+    return regressions
+
+def cleanup():
+    """Remove documents created by write benchmarks."""
+    for subject in SUBJECT_CODES:
+        get_collection(f"{subject}_mcq").delete_many({"benchmark": True})
+    get_collection("users").delete_many({"email": {"$regex": "^bench_created_"}})
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--subject", default="python")
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--only", nargs="*", help="run only these methods")
+    parser.add_argument("--warm", action="store_true", help="keep the query cache between calls")
+    parser.add_argument("--read-only", action="store_true", help="skip write methods")
+    parser.add_argument("--generate", type=int, metavar="QUESTIONS", help="generate a dataset of this size first")
+    parser.add_argument("--output", help="write JSON results to this file")
+    parser.add_argument("--baseline", help="compare against a previous JSON result")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed median slowdown (0.25 = 25%%)")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0, help="ignore slowdowns smaller than this")
+    parser.add_argument("--force", action="store_true", help="allow writes to a DB_NAME without 'bench'")
+    args = parser.parse_args()
+
+    if (args.generate or not args.read_only) and not require_scratch_database():
+        return 1
+    if args.generate:
+        from benchmarks.generate_data import generate
+        generate(questions=args.generate, interns=50, audit_events=args.generate * 2, drop=True)
+
+    db_service = DatabaseService()
+    ctx = build_context(db_service, args.subject, args.iterations)
+    cases = benchmark_cases(db_service, ctx, include_writes=not args.read_only)
+    if args.only:
+        cases = {name: call for name, call in cases.items() if name in args.only}
+    # Left out by --only/--read-only rather than removed, so not a regression when missing
+    excluded = sorted(set(benchmark_cases(db_service, ctx, include_writes=True)) - set(cases))
+
+    results = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "db_name": os.getenv("DB_NAME"),
+            "subject": args.subject,
+            "iterations": args.iterations,
+            "cache": "warm" if args.warm else "cold",
+            "python": platform.python_version(),
+        },
+        "methods": {},
+        "skipped": SKIPPED,
+        "excluded": excluded,
+    }
+
+    print(f"{'method':<38} {'median':>9} {'p95':>9} {'trips':>6}")
+    try:
+        for name, call in cases.items():
+            try:
+                result = run_case(call, args.iterations, args.warm)
+                print(f"{name:<38} {result['median_ms']:>7.2f}ms {result['p95_ms']:>7.2f}ms {result['round_trips']:>6.1f}")
+            except Exception as e:
+                # Recorded so the baseline gate reports it as a failure
+                result = {"error": f"{type(e).__name__}: {e}"}
+                print(f"{name:<38} ERROR {result['error']}")
+            results["methods"][name] = result
+    finally:
+        if not args.read_only:
+            cleanup()
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold, args.min_delta_ms)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) against {args.baseline}:")
+            for message in regressions:
+                print(f"  {message}")
+            return 1
+        print(f"\nNo regressions against {args.baseline}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -67,4 +67,64 @@ class PaginationComponent:
     
     def get_offset(self):
         """Get offset for database queries."""
-        return (self.get_current_page() - 1) * self.items_per_page
\ No newline at end of file
+        return (self.get_current_page() - 1) * self.items_per_page
+
+class KeysetPaginationComponent:
+    """Cursor pagination over (day, seq, _id) keys; works with DatabaseService.get_questions_page."""
+    def __init__(self, items_per_page=50, key_prefix=""):
+        self.items_per_page = items_per_page
+        self.key_prefix = key_prefix
+        
+        # Initialize session state
+        if f'{key_prefix}_cursor' not in st.session_state:
+            self.reset()
+    
+    def reset(self):
+        """Go back to the first page and forget the cached total (e.g. after filters change)."""
+        st.session_state[f'{self.key_prefix}_cursor'] = {}
+        st.session_state[f'{self.key_prefix}_current_page'] = 1
+        st.session_state[f'{self.key_prefix}_total'] = None
+    
+    def get_cursor(self):
+        """Keyword arguments for get_questions_page (cursor plus cached total)."""
+        cursor = dict(st.session_state[f'{self.key_prefix}_cursor'])
+        cursor['size'] = self.items_per_page
+        cursor['total'] = st.session_state[f'{self.key_prefix}_total']
+        return cursor
+    
+    def render(self, page_result):
+        """Render First/Prev/Next/Last controls for a get_questions_page result."""
+        st.session_state[f'{self.key_prefix}_total'] = page_result['total']
+        total_pages = math.ceil(page_result['total'] / self.items_per_page) if page_result['total'] > 0 else 1
+        current_page = st.session_state[f'{self.key_prefix}_current_page']
+        
+        col1, col2, col3, col4, col5 = st.columns([1, 1, 2, 1, 1])
+        
+        with col1:
+            if st.button("⏮️ First", key=f"{self.key_prefix}_first", disabled=not page_result['has_prev']):
+                self._move({}, 1)
+        
+        with col2:
+            if st.button("⬅️ Prev", key=f"{self.key_prefix}_prev", disabled=not page_result['has_prev']):
+                self._move({'before': page_result['first_key']}, max(1, current_page - 1))
+        
+        with col3:
+            st.write(f"Page {current_page} of {total_pages}")
+        
+        with col4:
+            if st.button("➡️ Next", key=f"{self.key_prefix}_next", disabled=not page_result['has_next']):
+                self._move({'after': page_result['last_key']}, min(total_pages, current_page + 1))
+        
+        with col5:
+            if st.button("⏭️ Last", key=f"{self.key_prefix}_last", disabled=not page_result['has_next']):
+                self._move({'last': True}, total_pages)
+        
+        st.caption(f"Showing {len(page_result['questions'])} of {page_result['total']} items")
+        
+        return current_page
+    
+    def _move(self, cursor, page):
+        """Store the new cursor and rerun."""
+        st.session_state[f'{self.key_prefix}_cursor'] = cursor
+        st.session_state[f'{self.key_prefix}_current_page'] = page
+        st.rerun()
@@ -3,6 +3,8 @@ import os
 from pymongo import MongoClient
 import streamlit as st
 from dotenv import load_dotenv
+from config.indexes import ensure_indexes, print_index_report
+from config.query_monitor import query_monitor
 
 # Load environment variables
 load_dotenv()
@@ -12,8 +14,15 @@ def get_database():
     """Get MongoDB database connection."""
     mongo_uri = os.getenv("MONGO_URI")
     db_name = os.getenv("DB_NAME", "qbank_system_db")
-    client = MongoClient(mongo_uri)
-    return client[db_name]
+    
+    # Single-statement writes/reads are retried once on transient network errors
+    # query_monitor attributes every command to its DatabaseService method for the admin panel
+    client = MongoClient(mongo_uri, retryWrites=True, retryReads=True, event_listeners=[query_monitor])
+    db = client[db_name]
+    
+    # Runs once per process thanks to cache_resource
+    print_index_report(ensure_indexes(db))
+    return db
 
 def get_collection(collection_name):
     """Get specific collection."""
@@ -0,0 +1,98 @@
+"""Index definitions and bootstrap for MongoDB collections."""
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import OperationFailure
+from utils.constants import SUBJECTS, IDEMPOTENCY_TTL
+
+# Verified questions are the only ones carrying a Q_id
+VERIFIED_FILTER = {"Q_id": {"$exists": True}}
+
+def question_indexes():
+    """Index specs shared by every {subject}_mcq collection."""
+    return [
+        # Unverified lookups: partial filters can't express "$exists: false", so Q_id
+        # leads the key and a missing Q_id is a single null bound, in full DAY_ORDER
+        # (day, seq, _id) so listings and keyset seeks never sort in memory
+        ([("Q_id", ASCENDING), ("day", ASCENDING), ("seq", ASCENDING), ("_id", ASCENDING)], {"name": "qid_day_seq_id"}),
+        # Verified questions by day
+        ([("day", ASCENDING), ("seq", ASCENDING)], {"name": "verified_day_seq", "partialFilterExpression": VERIFIED_FILTER}),
+        # Day order across verified and unverified questions
+        ([("day", ASCENDING), ("seq", ASCENDING), ("_id", ASCENDING)], {"name": "day_seq"}),
+        # Latest Q_id per subject in numeric order (Q_id strings misorder past 999)
+        ([("Q_num", DESCENDING)], {"name": "verified_qnum", "partialFilterExpression": VERIFIED_FILTER}),
+        # One question per Q_id
+        ([("Q_id", ASCENDING)], {"name": "qid_unique", "unique": True, "partialFilterExpression": VERIFIED_FILTER}),
+    ]
+
+# collection name -> list of (keys, options)
+INDEXES = {
+    **{f"{subject}_mcq": question_indexes() for subject in SUBJECTS.values()},
+    "users": [
+        ([("username", ASCENDING)], {"name": "username_unique", "unique": True}),
+        ([("user_id", ASCENDING)], {"name": "user_id_unique", "unique": True}),
+        ([("role", ASCENDING)], {"name": "role"}),
+    ],
+    "audit_events": [
+        ([("intern_id", ASCENDING), ("timestamp", DESCENDING)], {"name": "intern_timestamp"}),
+        ([("question_id", ASCENDING)], {"name": "question_id"}),
+        ([("action", ASCENDING), ("timestamp", DESCENDING)], {"name": "action_timestamp"}),
+    ],
+    "progress_counters": [
+        ([("intern_id", ASCENDING), ("subject", ASCENDING)], {"name": "intern_subject", "unique": True}),
+    ],
+    # Keys are unique by _id; the TTL index expires old submissions
+    "idempotency_keys": [
+        ([("created_at", ASCENDING)], {"name": "created_at_ttl", "expireAfterSeconds": IDEMPOTENCY_TTL}),
+    ],
+}
+
+def _is_prefix(keys, other_keys):
+    """Whether keys is a strict prefix of other_keys."""
+    return len(keys) < len(other_keys) and list(other_keys[:len(keys)]) == list(keys)
+
+def ensure_indexes(db):
+    """Create any missing indexes (idempotent) and return a per-collection report."""
+    report = {}
+
+    for collection_name, specs in INDEXES.items():
+        collection = db[collection_name]
+        existing = collection.index_information()
+        entry = {"created": [], "failed": [], "unmanaged": [], "redundant": []}
+
+        for keys, options in specs:
+            if options["name"] in existing:
+                continue
+            try:
+                collection.create_index(keys, **options)
+                entry["created"].append(options["name"])
+            except OperationFailure as e:
+                # e.g. duplicate usernames blocking a unique index, or a conflicting definition
+                entry["failed"].append(f"{options['name']}: {e}")
+
+        expected_names = {options["name"] for _, options in specs}
+        existing = collection.index_information()
+        for name, info in existing.items():
+            if name == "_id_":
+                continue
+            if name not in expected_names:
+                entry["unmanaged"].append(name)
+            # A plain index whose keys prefix another index adds write cost for no read benefit
+            plain = not info.get("unique") and "partialFilterExpression" not in info
+            if plain and any(_is_prefix(info["key"], other["key"])
+                             for other_name, other in existing.items() if other_name != name):
+                entry["redundant"].append(name)
+
+        if any(entry.values()):
+            report[collection_name] = entry
+
+    return report
+
+def print_index_report(report):
+    """Print missing (created/failed) and unmanaged/redundant indexes."""
+    if not report:
+        print("Indexes: all expected indexes present")
+        return
+
+    for collection_name, entry in sorted(report.items()):
+        for label in ["created", "failed", "unmanaged", "redundant"]:
+            for name in entry[label]:
+                print(f"Indexes: {collection_name}: {label} {name}")
@@ -0,0 +1,213 @@
+"""In-process MongoDB command monitoring for the admin performance panel."""
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+import bson
+from pymongo import monitoring
+
+# Latency samples kept per DatabaseService method for percentiles
+SAMPLES_PER_METHOD = 500
+SLOW_QUERY_LIMIT = 20
+RERUN_HISTORY = 100
+# Reply sizes are measured on one reply in this many per method (encoding every reply is not free)
+BYTES_SAMPLE_EVERY = 20
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a list of numbers (None when empty)."""
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+def _caller():
+    """Return (DatabaseService method, view function) on the current call stack."""
+    method, view = None, None
+    frame = sys._getframe(2)
+    while frame is not None:
+        filename = frame.f_code.co_filename.replace("\\", "/")
+        if filename.endswith("services/db_service.py"):
+            # Keep walking: the outermost service frame is the public method, not a helper
+            method = frame.f_code.co_name
+        elif "/views/" in filename and view is None:
+            view = frame.f_code.co_name
+        frame = frame.f_back
+    return method or "(direct)", view or "(none)"
+
+def _reply_documents(event):
+    """Number of documents a command returned (or affected, for writes)."""
+    reply = event.reply
+    cursor = reply.get("cursor")
+    if cursor:
+        return len(cursor.get("firstBatch", cursor.get("nextBatch", [])))
+    return reply.get("n", 0)
+
+class QueryMonitor(monitoring.CommandListener):
+    """Record latency, documents and reply bytes per command, attributed to the caller.
+
+    Commands from background threads (change stream watcher, snapshot worker) are
+    left out; work handed to pool threads is credited to the caller that submitted it.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._local = threading.local()
+        self.reset()
+
+    def reset(self):
+        """Drop all recorded statistics."""
+        with self._lock:
+            self.started_at = time.time()
+            # method -> {"calls", "total_ms", "documents", "sampled_bytes", "sampled_replies", "failures", "latencies"}
+            self.methods = {}
+            self.views = {}  # view -> {"calls", "total_ms"}
+            self.slow_queries = []
+            self.reruns = deque(maxlen=RERUN_HISTORY)
+
+    def ignore_current_thread(self):
+        """Leave this (background) thread's commands out of the statistics."""
+        self._local.ignore = True
+
+    def capture(self):
+        """Attribution of the current caller, to hand to work it submits to another thread."""
+        method, view = _caller()
+        return {"method": method, "view": view, "rerun": getattr(self._local, "rerun", None),
+                "ignore": getattr(self._local, "ignore", False)}
+
+    @contextmanager
+    def attach(self, context):
+        """Credit this thread's commands to a context captured on the submitting thread."""
+        self._local.context = context
+        try:
+            yield
+        finally:
+            self._local.context = None
+
+    def started(self, event):
+        context = getattr(self._local, "context", None)
+        if getattr(self._local, "ignore", False) or (context and context["ignore"]):
+            return
+        if context:
+            method, view, rerun = context["method"], context["view"], context["rerun"]
+        else:
+            method, view = _caller()
+            rerun = getattr(self._local, "rerun", None)
+        command = event.command
+        collection = command.get(event.command_name)
+        if event.command_name == "getMore":
+            collection = command.get("collection")
+        self._pending[(event.connection_id, event.request_id)] = (
+            method, view, event.command_name, collection if isinstance(collection, str) else None
+        )
+        if rerun is not None:
+            # Pool threads may count into the same rerun concurrently
+            with self._lock:
+                rerun["queries"] += 1
+                rerun["by_method"][method] = rerun["by_method"].get(method, 0) + 1
+
+    def succeeded(self, event):
+        self._record(event, _reply_documents(event))
+
+    def failed(self, event):
+        self._record(event, 0, failed=True)
+
+    def _record(self, event, documents, failed=False):
+        pending = self._pending.pop((event.connection_id, event.request_id), None)
+        if pending is None:
+            return
+        method, view, command_name, collection = pending
+        duration_ms = event.duration_micros / 1000
+
+        # Decided from an unlocked read; the sample rate only needs to be roughly right
+        stats = self.methods.get(method)
+        sampled = not failed and (stats is None or stats["calls"] % BYTES_SAMPLE_EVERY == 0)
+        reply_bytes = len(bson.encode(event.reply)) if sampled else None
+
+        with self._lock:
+            stats = self.methods.setdefault(method, {
+                "calls": 0, "total_ms": 0.0, "documents": 0, "sampled_bytes": 0, "sampled_replies": 0,
+                "failures": 0, "latencies": deque(maxlen=SAMPLES_PER_METHOD)
+            })
+            stats["calls"] += 1
+            stats["total_ms"] += duration_ms
+            stats["documents"] += documents
+            if reply_bytes is not None:
+                stats["sampled_bytes"] += reply_bytes
+                stats["sampled_replies"] += 1
+            stats["failures"] += int(failed)
+            stats["latencies"].append(duration_ms)
+
+            view_stats = self.views.setdefault(view, {"calls": 0, "total_ms": 0.0})
+            view_stats["calls"] += 1
+            view_stats["total_ms"] += duration_ms
+
+            if len(self.slow_queries) < SLOW_QUERY_LIMIT or duration_ms > self.slow_queries[-1]["duration_ms"]:
+                # Only the few slow-list entries get an exact size
+                if reply_bytes is None:
+                    reply_bytes = 0 if failed else len(bson.encode(event.reply))
+                self.slow_queries.append({
+                    "duration_ms": duration_ms, "method": method, "view": view,
+                    "command": command_name, "collection": collection,
+                    "documents": documents, "bytes": reply_bytes, "at": time.time()
+                })
+                self.slow_queries.sort(key=lambda q: q["duration_ms"], reverse=True)
+                del self.slow_queries[SLOW_QUERY_LIMIT:]
+
+    @contextmanager
+    def track_rerun(self, label):
+        """Count the commands issued by one Streamlit script run on this thread."""
+        rerun = {"label": label, "at": time.time(), "queries": 0, "by_method": {}}
+        self._local.rerun = rerun
+        start = time.perf_counter()
+        try:
+            yield rerun
+        finally:
+            rerun["duration_ms"] = (time.perf_counter() - start) * 1000
+            self._local.rerun = None
+            with self._lock:
+                self.reruns.append(rerun)
+
+    def method_summary(self):
+        """Per-method call counts, rolling latency percentiles and transfer totals."""
+        with self._lock:
+            rows = []
+            for method, stats in self.methods.items():
+                latencies = list(stats["latencies"])
+                rows.append({
+                    "method": method,
+                    "calls": stats["calls"],
+                    "total_ms": stats["total_ms"],
+                    "p50_ms": percentile(latencies, 50),
+                    "p95_ms": percentile(latencies, 95),
+                    "p99_ms": percentile(latencies, 99),
+                    "max_ms": max(latencies) if latencies else None,
+                    "documents": stats["documents"],
+                    # Estimated from the sampled replies' average size
+                    "kb": (stats["sampled_bytes"] / stats["sampled_replies"] * stats["calls"] / 1024
+                           if stats["sampled_replies"] else 0.0),
+                    "failures": stats["failures"]
+                })
+        return sorted(rows, key=lambda row: row["total_ms"], reverse=True)
+
+    def overall_percentiles(self):
+        """Latency percentiles across the retained samples of every method."""
+        with self._lock:
+            latencies = [ms for stats in self.methods.values() for ms in stats["latencies"]]
+        return {pct: percentile(latencies, pct) for pct in (50, 95, 99)}
+
+    def view_summary(self):
+        """Command counts and total database time per Streamlit view function."""
+        with self._lock:
+            return sorted(
+                [{"view": view, "calls": s["calls"], "total_ms": s["total_ms"]} for view, s in self.views.items()],
+                key=lambda row: row["total_ms"], reverse=True
+            )
+
+    def snapshot(self):
+        """Copies of the slow query list and recent rerun records."""
+        with self._lock:
+            return list(self.slow_queries), list(self.reruns)
+
+query_monitor = QueryMonitor()
@@ -1,6 +1,10 @@
 """Main entry point for Question Bank Verification System."""
 import streamlit as st
 from services.auth_service import AuthService
+from services.change_stream_watcher import start_change_stream_watcher
+from services.snapshot_service import start_snapshot_worker
+from config.query_monitor import query_monitor
+from services.cache_service import rerun_memo
 
 # Page configuration
 st.set_page_config(
@@ -111,12 +115,18 @@ st.markdown("""
 def main():
     """Main application entry point."""
     auth_service = AuthService()
+    # Cross-process cache invalidation (once per process, opt-in via ENABLE_CHANGE_STREAMS)
+    start_change_stream_watcher()
+    # Dashboard snapshot and periodic subject catalog reconcile (once per process)
+    start_snapshot_worker()
     
-    # Check authentication
+    # Check authentication; identical reads within this run are served from the rerun memo
     if not auth_service.is_authenticated():
-        show_login_page(auth_service)
+        with query_monitor.track_rerun("login") as rerun, rerun_memo(rerun):
+            show_login_page(auth_service)
     else:
-        show_main_app(auth_service)
+        with query_monitor.track_rerun(auth_service.get_current_user()['role']) as rerun, rerun_memo(rerun):
+            show_main_app(auth_service)
 
 def show_login_page(auth_service):
     """Display login interface."""
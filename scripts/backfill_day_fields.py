@@ -0,0 +1,24 @@
+"""Backfill numeric day/seq fields parsed from Tags on existing questions.
+
+Day queries and ordering use these fields instead of a case-insensitive
+regex on Tags. The app backfills a subject itself before its day reads
+(and during every subject catalog reconcile), so this is only needed to
+convert a large import ahead of time. Safe to interrupt
+and re-run; only questions without a `day` field are touched:
+
+    python -m scripts.backfill_day_fields            # all subjects
+    python -m scripts.backfill_day_fields python     # selected subjects
+"""
+import sys
+from services.db_service import DatabaseService
+from utils.constants import SUBJECTS
+
+def main(subjects=None):
+    """Backfill the given subjects (or all of them)."""
+    db_service = DatabaseService()
+    for subject in subjects or SUBJECTS.values():
+        updated = db_service.backfill_day_fields(subject)
+        print(f"{subject}: {updated} questions updated")
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,51 @@
+"""Check that hot admin queries are index-backed using explain().
+
+Exits non-zero if any checked query plan falls back to a collection scan or
+does not use the expected index:
+
+    python -m scripts.check_query_plans
+"""
+import sys
+from config.database import get_database
+from services.db_service import DatabaseService
+
+def plan_stages(plan):
+    """Yield (stage, index_name) for every stage found in an explain document."""
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            yield plan["stage"], plan.get("indexName")
+        for value in plan.values():
+            yield from plan_stages(value)
+    elif isinstance(plan, list):
+        for item in plan:
+            yield from plan_stages(item)
+
+def explain_aggregate(collection_name, pipeline):
+    """Run an aggregation with explain and return the raw explain document."""
+    db = get_database()
+    return db.command("aggregate", collection_name, pipeline=pipeline, explain=True)
+
+def check(label, explain_doc, expected_index):
+    """Print and return whether the plan uses expected_index without a COLLSCAN."""
+    stages = list(plan_stages(explain_doc))
+    index_names = {index for stage, index in stages if stage == "IXSCAN"}
+    collscan = any(stage == "COLLSCAN" for stage, _ in stages)
+    ok = expected_index in index_names and not collscan
+
+    status = "OK  " if ok else "FAIL"
+    print(f"{status} {label}: indexes={sorted(index_names) or '-'} collscan={collscan}")
+    return ok
+
+def main():
+    db_service = DatabaseService()
+    results = [
+        check(
+            "verified today (audit_events timestamp predicate)",
+            explain_aggregate("audit_events", db_service._verified_today_pipeline()),
+            "action_timestamp"
+        ),
+    ]
+    return 0 if all(results) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
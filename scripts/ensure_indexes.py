@@ -0,0 +1,12 @@
+"""Create missing indexes and report missing or redundant ones.
+
+The app does this once per process on first connection; run it by hand after
+a deploy to see the report before traffic arrives:
+
+    python -m scripts.ensure_indexes
+"""
+from config.database import get_database
+from config.indexes import ensure_indexes, print_index_report
+
+if __name__ == "__main__":
+    print_index_report(ensure_indexes(get_database()))
@@ -0,0 +1,104 @@
+"""Migrate legacy per-intern audit arrays into the flat audit_events store.
+
+Copies every entry of `activities`, `verified_modified_activities`,
+`reverified_remodified_activities` and `other_activities` from
+audit_collection into one audit_events document per event. Progress is
+checkpointed in the `migrations` collection after each batch, and event ids
+are derived from their position in the legacy document, so the migration can
+be interrupted and re-run safely:
+
+    python -m scripts.migrate_audit_events [--batch-size 500] [--restart]
+"""
+import argparse
+from datetime import datetime
+from pymongo import ReplaceOne
+from config.database import get_collection
+from utils.qid import subject_for_qid
+
+MIGRATION_ID = "audit_events_v1"
+ACTIVITY_FIELDS = [
+    "activities",  # Old structure
+    "verified_modified_activities",
+    "reverified_remodified_activities",
+    "other_activities"
+]
+
+def legacy_events(intern_doc):
+    """Yield (event_id, event) pairs for every activity in a legacy document."""
+    intern_id = intern_doc.get("intern_id")
+    for field in ACTIVITY_FIELDS:
+        for index, activity in enumerate(intern_doc.get(field, [])):
+            question_id = str(activity.get("question_id", ""))
+            event = {
+                "_id": f"legacy:{intern_doc['_id']}:{field}:{index}",
+                "intern_id": intern_id,
+                "question_id": question_id,
+                "subject": subject_for_qid(question_id),
+                "action": activity.get("action"),
+                "timestamp": activity.get("timestamp"),
+                "legacy_field": field
+            }
+            if activity.get("changes"):
+                event["changes"] = activity["changes"]
+            yield event
+
+def migrate(batch_size=500, restart=False):
+    """Run (or resume) the migration; returns the number of events written."""
+    audit_collection = get_collection("audit_collection")
+    audit_events = get_collection("audit_events")
+    migrations = get_collection("migrations")
+
+    if restart:
+        migrations.delete_one({"_id": MIGRATION_ID})
+
+    checkpoint = migrations.find_one({"_id": MIGRATION_ID}) or {}
+    if checkpoint.get("completed_at"):
+        print("Audit events migration already completed; use --restart to run again.")
+        return 0
+
+    query = {}
+    if checkpoint.get("last_doc_id") is not None:
+        query["_id"] = {"$gt": checkpoint["last_doc_id"]}
+        print(f"Resuming after audit document {checkpoint['last_doc_id']}")
+
+    migrated = checkpoint.get("migrated_events", 0)
+    operations = []
+
+    def flush(last_doc_id):
+        nonlocal operations, migrated
+        if operations:
+            audit_events.bulk_write(operations, ordered=False)
+            migrated += len(operations)
+            operations = []
+        migrations.update_one(
+            {"_id": MIGRATION_ID},
+            {"$set": {"last_doc_id": last_doc_id, "migrated_events": migrated, "updated_at": datetime.now()}},
+            upsert=True
+        )
+
+    for intern_doc in audit_collection.find(query).sort("_id", 1):
+        for event in legacy_events(intern_doc):
+            operations.append(ReplaceOne({"_id": event["_id"]}, event, upsert=True))
+            if len(operations) >= batch_size:
+                # Mid-document flush; checkpoint stays on the previous document
+                audit_events.bulk_write(operations, ordered=False)
+                migrated += len(operations)
+                operations = []
+
+        flush(intern_doc["_id"])
+        print(f"Migrated {intern_doc.get('intern_id')} ({migrated} events so far)")
+
+    migrations.update_one(
+        {"_id": MIGRATION_ID},
+        {"$set": {"migrated_events": migrated, "completed_at": datetime.now()}},
+        upsert=True
+    )
+    print(f"Audit events migration complete: {migrated} events")
+    return migrated
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--restart", action="store_true", help="ignore the saved checkpoint")
+    args = parser.parse_args()
+    migrate(batch_size=args.batch_size, restart=args.restart)
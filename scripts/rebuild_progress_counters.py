@@ -0,0 +1,22 @@
+"""Rebuild per-intern, per-subject progress counters from audit history.
+
+Use after migrating audit events, or whenever dashboard progress looks out of
+step with the audit log. Run while interns are idle: increments made during
+the rebuild can be overwritten.
+
+    python -m scripts.rebuild_progress_counters            # all interns
+    python -m scripts.rebuild_progress_counters INT004     # one intern
+"""
+import sys
+from services.db_service import DatabaseService
+
+def main(intern_ids=None):
+    """Rebuild counters for the given interns (or everyone)."""
+    db_service = DatabaseService()
+    for intern_id in intern_ids or [None]:
+        result = db_service.rebuild_progress_counters(intern_id)
+        label = intern_id or "all interns"
+        print(f"{label}: {result['rebuilt']} counters rebuilt, {result['removed']} stale removed")
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,39 @@
+"""Recount subject_catalog totals from the question collections.
+
+Verify and ingest keep the catalog up to date incrementally; this corrects
+drift from writes made outside the app (or lost between a question write and
+its catalog update). The app already reconciles every
+CATALOG_RECONCILE_INTERVAL seconds from its background worker; run this to
+reconcile right away, or on a schedule of its own with --interval:
+
+    python -m scripts.reconcile_subject_catalog                   # all subjects once
+    python -m scripts.reconcile_subject_catalog python java       # some subjects
+    python -m scripts.reconcile_subject_catalog --interval 3600   # every hour
+"""
+import argparse
+import time
+from services.db_service import DatabaseService
+
+def reconcile(subjects=None):
+    """Reconcile once and print any drift corrected."""
+    drift = DatabaseService().reconcile_subject_catalog(subjects or None)
+    if not drift:
+        print("Subject catalog: no drift")
+    for subject, changes in sorted(drift.items()):
+        if "error" in changes:
+            print(f"Subject catalog: {subject} not reconciled: {changes['error']}")
+            continue
+        print(f"Subject catalog: {subject} total {changes['total'][0]} -> {changes['total'][1]}, "
+              f"verified {changes['verified'][0]} -> {changes['verified'][1]}")
+    return drift
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("subjects", nargs="*")
+    parser.add_argument("--interval", type=int, help="repeat every N seconds")
+    args = parser.parse_args()
+
+    reconcile(args.subjects)
+    while args.interval:
+        time.sleep(args.interval)
+        reconcile(args.subjects)
@@ -0,0 +1,24 @@
+"""Seed or reconcile the per-prefix Q_id counters from existing Q_ids.
+
+Run once after deploying the counter-based allocator (after
+scripts.migrate_audit_events, so audit history is included), and again any
+time Q_ids were written outside the app:
+
+    python -m scripts.seed_qid_counters            # all prefixes
+    python -m scripts.seed_qid_counters PYM JSM    # selected prefixes
+"""
+import sys
+from services.db_service import DatabaseService
+
+def main(prefixes=None):
+    """Seed counters and print the resulting value per prefix."""
+    db_service = DatabaseService()
+    max_numbers = db_service.seed_qid_counters(prefixes or None)
+    
+    if not max_numbers:
+        print("No existing Q_ids found; counters will start at 1.")
+    for prefix, max_number in sorted(max_numbers.items()):
+        print(f"{prefix}: counter >= {max_number}")
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
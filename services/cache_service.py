@@ -0,0 +1,140 @@
+"""Process-wide TTL/LRU cache and per-rerun memo for DatabaseService read methods."""
+import copy
+import functools
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from utils.constants import CACHE_CONFIG
+
+class QueryCache:
+    """LRU cache with per-entry TTL, tag-based invalidation and hit/miss counters."""
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (expires_at, tags, value)
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def _count(self, namespace, field):
+        stats = self._stats.setdefault(namespace, {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0})
+        stats[field] += 1
+
+    def get(self, key):
+        """Return (hit, value) for key, dropping it if expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self._count(key[0], "hits")
+                return True, entry[2]
+            if entry:
+                del self._entries[key]
+            self._count(key[0], "misses")
+            return False, None
+
+    def set(self, key, value, ttl, tags=()):
+        """Store value for ttl seconds, evicting least recently used entries past max_entries."""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, frozenset(tags), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                evicted_key, _ = self._entries.popitem(last=False)
+                self._count(evicted_key[0], "evictions")
+
+    def invalidate(self, *tags):
+        """Drop every entry carrying any of the given tags."""
+        tags = set(tags)
+        with self._lock:
+            for key in [k for k, entry in self._entries.items() if entry[1] & tags]:
+                del self._entries[key]
+                self._count(key[0], "invalidations")
+
+    def invalidate_prefix(self, prefix):
+        """Drop every entry carrying a tag that starts with prefix."""
+        with self._lock:
+            for key in [k for k, entry in self._entries.items() if any(t.startswith(prefix) for t in entry[1])]:
+                del self._entries[key]
+                self._count(key[0], "invalidations")
+
+    def clear(self):
+        """Drop all entries (counters are kept)."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Per-method hit/miss/eviction/invalidation counters plus current size."""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "methods": copy.deepcopy(self._stats)
+            }
+
+query_cache = QueryCache(CACHE_CONFIG["max_entries"])
+
+def cached(ttl_key, tags=()):
+    """Cache a read method by arguments for CACHE_CONFIG[ttl_key] seconds under invalidation tags."""
+    # tags: list of tag strings, or a function of the method's arguments returning one
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            key = (method.__name__, args, tuple(sorted(kwargs.items())))
+            hit, value = query_cache.get(key)
+            if not hit:
+                value = method(self, *args, **kwargs)
+                entry_tags = tags(*args, **kwargs) if callable(tags) else tags
+                query_cache.set(key, value, CACHE_CONFIG[ttl_key], entry_tags)
+            # Callers may mutate results; never hand out the cached object itself
+            return copy.deepcopy(value)
+        return wrapper
+    return decorator
+
+# Memo for the script run executing on this thread (None outside rerun_memo)
+_rerun_memo = threading.local()
+
+@contextmanager
+def rerun_memo(record=None):
+    """Memoize DatabaseService reads for one script run; counts are copied into record on exit."""
+    memo = {"entries": {}, "calls": 0, "deduplicated": 0}
+    _rerun_memo.current = memo
+    try:
+        yield memo
+    finally:
+        _rerun_memo.current = None
+        if record is not None:
+            record["memo_calls"] = memo["calls"]
+            record["deduplicated"] = memo["deduplicated"]
+
+def memoized(method):
+    """Serve repeated identical reads within one rerun from the rerun memo."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        memo = getattr(_rerun_memo, "current", None)
+        key = (method.__name__, args, tuple(sorted(kwargs.items())))
+        try:
+            hash(key)
+        except TypeError:
+            # e.g. a list of ids; not worth normalising
+            memo = None
+        if memo is None:
+            return method(self, *args, **kwargs)
+        
+        memo["calls"] += 1
+        if key in memo["entries"]:
+            memo["deduplicated"] += 1
+        else:
+            memo["entries"][key] = method(self, *args, **kwargs)
+        return copy.deepcopy(memo["entries"][key])
+    return wrapper
+
+def writes(method):
+    """Drop the rerun memo after a write so later reads in the rerun see it."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            memo = getattr(_rerun_memo, "current", None)
+            if memo is not None:
+                memo["entries"].clear()
+    return wrapper
@@ -0,0 +1,122 @@
+"""Cross-process cache invalidation driven by MongoDB change streams.
+
+Each Streamlit process keeps its own query cache, so a write served by one
+process is only visible to the others after TTL expiry. With
+ENABLE_CHANGE_STREAMS=true every process tails a database change stream on
+the question, users, audit, progress counter and subject catalog collections
+and evicts the matching cache tags.
+Change streams need a replica set (a single-node one is enough); without one
+the watcher logs a warning and the cache falls back to TTL-only invalidation.
+"""
+import os
+import threading
+import streamlit as st
+from pymongo.errors import OperationFailure, PyMongoError
+from config.database import get_database
+from config.query_monitor import query_monitor
+from services.cache_service import query_cache
+
+WATCHED_COLLECTIONS = r"(_mcq$|^users$|^audit_events$|^progress_counters$|^subject_catalog$)"
+
+# Server error codes meaning the stream can't resume from the saved token
+RESUME_LOST_CODES = {260, 280, 286}  # InvalidResumeToken, ChangeStreamFatalError, ChangeStreamHistoryLost
+# Server error codes meaning change streams are not available on this deployment
+UNSUPPORTED_CODES = {40573, 40324}  # NotAReplicaSet, UnrecognizedPipelineStage
+
+class ChangeStreamWatcher:
+    """Background thread mapping change events to query cache invalidations."""
+    def __init__(self, db, retry_delay=5):
+        self.db = db
+        self.retry_delay = retry_delay
+        self.resume_token = None
+        self.status = "stopped"
+        self.events_seen = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Start the watcher thread (no-op if already running)."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="change-stream-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Ask the watcher thread to exit after its current wait."""
+        self._stop.set()
+
+    def _run(self):
+        # Change stream getMores block for max_await_time_ms; they are not app queries
+        query_monitor.ignore_current_thread()
+        pipeline = [{"$match": {"$or": [
+            {"ns.coll": {"$regex": WATCHED_COLLECTIONS}},
+            {"operationType": {"$in": ["dropDatabase", "invalidate"]}}
+        ]}}]
+
+        while not self._stop.is_set():
+            try:
+                with self.db.watch(pipeline, resume_after=self.resume_token, max_await_time_ms=1000) as stream:
+                    self.status = "watching"
+                    print(f"Change streams: watching (resumed={self.resume_token is not None})")
+                    while not self._stop.is_set() and stream.alive:
+                        change = stream.try_next()
+                        if change is not None:
+                            self.handle_change(change)
+                            self.events_seen += 1
+                        # Keep the token current even while idle so a resume never replays far back
+                        self.resume_token = stream.resume_token
+            except OperationFailure as e:
+                if e.code in UNSUPPORTED_CODES:
+                    self.status = "unavailable"
+                    print(f"Change streams unavailable ({e}); cache uses TTL-only invalidation")
+                    return
+                if e.code in RESUME_LOST_CODES:
+                    # Events since the token are gone; drop everything they might have invalidated
+                    print(f"Change streams: cannot resume ({e}); clearing cache and restarting")
+                    self.resume_token = None
+                    query_cache.clear()
+                    continue
+                self._wait_after_error(e)
+            except PyMongoError as e:
+                self._wait_after_error(e)
+
+        self.status = "stopped"
+
+    def _wait_after_error(self, error):
+        self.status = "retrying"
+        print(f"Change streams: {error}; retrying in {self.retry_delay}s")
+        self._stop.wait(self.retry_delay)
+
+    def handle_change(self, change):
+        """Evict the cache tags affected by one change event."""
+        operation = change["operationType"]
+        collection = change.get("ns", {}).get("coll", "")
+
+        if operation in ("drop", "rename", "dropDatabase", "invalidate"):
+            query_cache.clear()
+        elif collection.endswith("_mcq"):
+            query_cache.invalidate(f"subject:{collection[:-len('_mcq')]}", "subjects")
+        elif collection == "subject_catalog":
+            # Catalog counts land after the question write, so the _mcq event alone can be
+            # followed by a re-cache of the old count
+            subject = change.get("documentKey", {}).get("_id")
+            query_cache.invalidate("subjects", *([f"subject:{subject}"] if subject else []))
+        elif collection == "users":
+            # Update events only carry the ObjectId, not user_id
+            query_cache.invalidate("interns", "subjects")
+            query_cache.invalidate_prefix("user:")
+        elif collection in ("audit_events", "progress_counters"):
+            # Counters are bumped in a separate write after the audit insert, so a read between
+            # the two can re-cache old counters; the counter event evicts them again.
+            # Every progress read carries the "progress" tag, per-intern ones included
+            query_cache.invalidate("progress")
+
+@st.cache_resource
+def start_change_stream_watcher():
+    """Start one watcher per process when ENABLE_CHANGE_STREAMS is set."""
+    if os.getenv("ENABLE_CHANGE_STREAMS", "false").lower() != "true":
+        return None
+    watcher = ChangeStreamWatcher(get_database())
+    watcher.start()
+    return watcher
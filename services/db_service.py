@@ -1,30 +1,137 @@
 """Database service for optimized MongoDB operations."""
 import streamlit as st
+import hashlib
+import json
 import os
-from datetime import datetime
+import threading
+import time
+from collections import OrderedDict, Counter
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime, timedelta
 from config.database import get_collection
-from utils.constants import SUBJECTS, TYPES
-from pymongo import InsertOne
+from config.query_monitor import query_monitor
+from services.cache_service import cached, memoized, writes, query_cache
+from utils.constants import SUBJECTS, SUBJECT_CODES, TYPES, PROGRESS_ACTIONS
+from utils.qid import format_qid, parse_qid, subject_for_qid
+from utils.tags import parse_day_tag, day_fields, day_label
+from pymongo import InsertOne, UpdateOne, ReplaceOne, ReturnDocument, ASCENDING, DESCENDING
+from pymongo.errors import BulkWriteError, DuplicateKeyError, ConnectionFailure, PyMongoError
+
+def _subject_tags(subject, *args, **kwargs):
+    """Cache tags for reads scoped to one subject."""
+    return [f"subject:{subject}"]
+
+def _catalog_tags(subject, *args, **kwargs):
+    """Cache tags for one subject's counts served from the subject catalog."""
+    return [f"subject:{subject}", "subjects"]
+
+def _progress_tags(intern_id, *args, **kwargs):
+    """Cache tags for reads of one intern's progress."""
+    return [f"progress:{intern_id}", "progress"]
+
+# Question order within a subject: numeric day, then sequence within the day
+DAY_ORDER = [("day", ASCENDING), ("seq", ASCENDING), ("_id", ASCENDING)]
+
+# Named field projections for read APIs; None fetches the whole document
+QUESTION_PROJECTIONS = {
+    # List rows and selectors: no options, explanations or images
+    "summary": {"Tags": 1, "day": 1, "seq": 1, "Q_id": 1, "Difficulty": 1, "Question": 1},
+    # Everything the verification editor displays or edits
+    "editor": {"Tags": 1, "day": 1, "seq": 1, "Q_id": 1, "Difficulty": 1, "Question": 1, "Options": 1,
+               "Correct_Option": 1, "Explanation": 1, "Text_Explanation": 1, "Image_URL": 1},
+    "full": None,
+}
+# Passwords are never returned by list APIs, whatever the profile
+USER_PROJECTIONS = {
+    "summary": {"user_id": 1, "username": 1, "name": 1, "email": 1, "role": 1, "status": 1,
+                "allocated_subjects": 1, "last_allocation": 1, "created_at": 1},
+    "full": {"password": 0},
+}
+
+# Clean enough to bulk verify: question text, four non-empty options and a valid answer
+CLEAN_QUESTION_FILTER = {
+    "Question": {"$regex": r"\S"},
+    **{f"Options.{key}": {"$regex": r"\S"} for key in ["A", "B", "C", "D"]},
+    "Correct_Option": {"$in": ["A", "B", "C", "D"]},
+}
+
+def _unverified_filter(question_id):
+    """Match one question only while it has no Q_id (the verify lookup)."""
+    from bson import ObjectId
+    return {"_id": ObjectId(question_id), "Q_id": {"$exists": False}}
+
+def _projection(profile, profiles=QUESTION_PROJECTIONS):
+    """Look up a named projection profile."""
+    if profile not in profiles:
+        raise ValueError(f"Unknown projection profile '{profile}' (expected one of {', '.join(profiles)})")
+    return profiles[profile]
+
+# ObjectId -> subject never changes, so resolved lookups are kept in a bounded LRU
+_QUESTION_SUBJECT_CACHE_SIZE = 10000
+_question_subjects = OrderedDict()
+_question_subjects_lock = threading.Lock()
+
+# Questions imported outside the app are found by probing for a missing day field,
+# at most once per subject per interval (seconds) in each process
+DAY_PROBE_INTERVAL = 5
+_day_probes = {}
+
+# Seconds a caller may spend seeding a new Q_id prefix before another may take over
+QID_SEED_LEASE = 30
+
+# Seconds a full catalog reconcile may run before another caller may start one
+CATALOG_RECONCILE_LEASE = 300
+
+# Shared pool for per-subject fan-out queries; MongoClient is thread-safe and pools connections
+_FAN_OUT_WORKERS = 8
+_FAN_OUT_TIMEOUT = 10
+_fan_out_pool = ThreadPoolExecutor(max_workers=_FAN_OUT_WORKERS, thread_name_prefix="db-fan-out")
 
 class DatabaseService:
     def __init__(self):
         pass
     
-    def get_paginated_questions(self, subject, page=1, size=50, filters=None, question_type="mcq"):
+    def _fan_out(self, func, items, timeout=_FAN_OUT_TIMEOUT):
+        """Run func(item) for all items in parallel; returns (results, failures) keyed by item."""
+        # Pool threads have no view frames or rerun of their own; credit their commands to this caller
+        context = query_monitor.capture()
+        
+        def run(item):
+            with query_monitor.attach(context):
+                return func(item)
+        
+        futures = {_fan_out_pool.submit(run, item): item for item in items}
+        done, not_done = wait(futures, timeout=timeout)
+        
+        results, failures = {}, {}
+        for future in done:
+            item = futures[future]
+            try:
+                results[item] = future.result()
+            except PyMongoError as e:
+                # One unreachable or slow collection shouldn't fail the whole call
+                failures[item] = str(e)
+        for future in not_done:
+            future.cancel()
+            failures[futures[future]] = f"timed out after {timeout}s"
+        
+        if failures:
+            print(f"Fan-out {getattr(func, '__name__', 'query')}: {len(failures)}/{len(futures)} failed: "
+                  + ", ".join(f"{item} ({error})" for item, error in sorted(failures.items())))
+        return results, failures
+    
+    @memoized
+    def get_paginated_questions(self, subject, page=1, size=50, filters=None, question_type="mcq", projection="full"):
         """Get paginated questions with caching (MCQ only)."""
         collection = get_collection(f"{subject}_mcq")
+        self._ensure_day_fields(subject)
         skip = (page - 1) * size
         
         # Show only questions without Q_id (unverified)
-        query = {"Q_id": {"$exists": False}}
-        if filters:
-            if filters.get('search'):
-                query['Question'] = {'$regex': filters['search'], '$options': 'i'}
-            if filters.get('day_tag'):
-                query['Tags'] = {'$regex': f"^{filters['day_tag']}", '$options': 'i'}
+        query = self._build_question_query(filters)
         
-        # Sort by Tags to maintain day order (day-1:1, day-1:2, etc.)
-        questions = list(collection.find(query).sort("Tags", 1).skip(skip).limit(size))
+        # Numeric day/seq order (day-2 before day-10, question 2 before 10)
+        questions = list(collection.find(query, _projection(projection)).sort(DAY_ORDER).skip(skip).limit(size))
         total = collection.count_documents(query)
         
         return {
@@ -34,67 +141,126 @@ class DatabaseService:
             'total_pages': (total + size - 1) // size
         }
     
-    def get_day_questions(self, subject, day_number, include_verified=False):
+    @memoized
+    def get_questions_page(self, subject, size=50, filters=None, after=None, before=None, last=False, total=None,
+                           projection="full"):
+        """Get unverified questions by seeking from a (day, seq, _id) key instead of skipping."""
+        collection = get_collection(f"{subject}_mcq")
+        self._ensure_day_fields(subject)
+        query = self._build_question_query(filters)
+        
+        # Callers pass back the total from the first page so it is counted once
+        if total is None:
+            total = collection.count_documents(query)
+        
+        backwards = bool(before) or last
+        if after:
+            query = {"$and": [query, self._seek_filter(after, "after")]}
+        elif before:
+            query = {"$and": [query, self._seek_filter(before, "before")]}
+        
+        sort = [(field, -direction) for field, direction in DAY_ORDER] if backwards else DAY_ORDER
+        
+        # One extra document tells us whether another page exists in this direction
+        questions = list(collection.find(query, _projection(projection)).sort(sort).limit(size + 1))
+        has_more = len(questions) > size
+        questions = questions[:size]
+        if backwards:
+            questions.reverse()
+        
+        return {
+            'questions': questions,
+            'total': total,
+            'has_next': has_more if not backwards else not last,
+            'has_prev': has_more if backwards else bool(after),
+            'first_key': self._seek_key(questions[0]) if questions else None,
+            'last_key': self._seek_key(questions[-1]) if questions else None
+        }
+    
+    def _build_question_query(self, filters=None):
+        """Query for unverified questions with optional search/day filters."""
+        query = {"Q_id": {"$exists": False}}
+        if filters:
+            if filters.get('search'):
+                query['Question'] = {'$regex': filters['search'], '$options': 'i'}
+            if filters.get('day_tag'):
+                day, _ = parse_day_tag(filters['day_tag'])
+                query['day'] = day
+        return query
+    
+    def _seek_key(self, question):
+        """Keyset position of a question in DAY_ORDER."""
+        return tuple(question.get(field) for field, _ in DAY_ORDER)
+    
+    def _seek_filter(self, key, direction):
+        """Filter matching documents strictly after/before key in DAY_ORDER."""
+        fields = [field for field, _ in DAY_ORDER]
+        clauses = []
+        
+        for i, field in enumerate(fields):
+            value = key[i]
+            clause = {fields[j]: key[j] for j in range(i)}
+            
+            # Nulls sort before every number, and $gt/$lt never match across types
+            if direction == "after":
+                clause[field] = {"$ne": None} if value is None else {"$gt": value}
+            elif value is None:
+                continue
+            else:
+                clause = {"$and": [clause, {"$or": [{field: {"$lt": value}}, {field: None}]}]}
+            clauses.append(clause)
+        
+        return {"$or": clauses} if clauses else {"_id": None}
+    
+    @memoized
+    def get_day_questions(self, subject, day_number, include_verified=False, projection="full"):
         """Get questions for a specific day (e.g., day-1)."""
         collection = get_collection(f"{subject}_mcq")
+        self._ensure_day_fields(subject)
         
-        # Query for specific day tag pattern
-        if include_verified:
-            query = {"Tags": {"$regex": f"^day-{day_number}:", "$options": "i"}}
-        else:
-            query = {
-                "Q_id": {"$exists": False},
-                "Tags": {"$regex": f"^day-{day_number}:", "$options": "i"}
-            }
+        # Index range scan on the numeric day field
+        query = {"day": int(day_number)}
+        if not include_verified:
+            query["Q_id"] = {"$exists": False}
         
-        # Sort by tag to maintain order (day-1:1, day-1:2, etc.)
-        questions = list(collection.find(query).sort("Tags", 1))
+        questions = list(collection.find(query, _projection(projection)).sort(DAY_ORDER))
         
         return questions
     
+    @memoized
+    @cached("questions_ttl", tags=_subject_tags)
     def get_available_days(self, subject, include_verified=False):
         """Get list of available days for a subject."""
         collection = get_collection(f"{subject}_mcq")
+        self._ensure_day_fields(subject)
         
-        # Get distinct day tags
+        # Get distinct days
         if include_verified:
-            match_query = {"Tags": {"$exists": True}}
+            match_query = {"day": {"$ne": None}}
         else:
-            match_query = {"Q_id": {"$exists": False}, "Tags": {"$exists": True}}
+            match_query = {"Q_id": {"$exists": False}, "day": {"$ne": None}}
         
         pipeline = [
             {"$match": match_query},
-            {"$project": {
-                "day": {"$arrayElemAt": [{"$split": ["$Tags", ":"]}, 0]}
-            }},
-            {"$group": {"_id": "$day"}}
+            {"$group": {"_id": "$day"}},
+            {"$sort": {"_id": 1}}
         ]
         
-        days = [doc["_id"] for doc in collection.aggregate(pipeline) if doc["_id"]]
-        
-        # Sort days numerically
-        def extract_day_number(day_str):
-            try:
-                return int(day_str.replace('day-', '').replace('Day-', ''))
-            except:
-                return 999
-        
-        return sorted(days, key=extract_day_number)
+        return [day_label(doc["_id"]) for doc in collection.aggregate(pipeline)]
     
+    @memoized
+    @cached("questions_ttl", tags=_subject_tags)
     def get_day_stats(self, subject, day_number):
         """Get statistics for a specific day."""
         collection = get_collection(f"{subject}_mcq")
+        self._ensure_day_fields(subject)
+        day = int(day_number)
         
         # Total questions for the day
-        total_query = {"Tags": {"$regex": f"^day-{day_number}:", "$options": "i"}}
-        total = collection.count_documents(total_query)
+        total = collection.count_documents({"day": day})
         
         # Verified questions for the day
-        verified_query = {
-            "Tags": {"$regex": f"^day-{day_number}:", "$options": "i"},
-            "Q_id": {"$exists": True}
-        }
-        verified = collection.count_documents(verified_query)
+        verified = collection.count_documents({"day": day, "Q_id": {"$exists": True}})
         
         return {
             "total": total,
@@ -102,298 +268,790 @@ class DatabaseService:
             "remaining": total - verified
         }
     
-    def reverify_question(self, question_id, intern_id, action="reverified", changes=None):
+    @memoized
+    @cached("questions_ttl", tags=_subject_tags)
+    def get_days_progress(self, subject):
+        """Get total/verified/remaining for every day of a subject in one aggregation."""
+        collection = get_collection(f"{subject}_mcq")
+        self._ensure_day_fields(subject)
+        
+        pipeline = [
+            {"$match": {"day": {"$ne": None}}},
+            {"$group": {
+                "_id": "$day",
+                "total": {"$sum": 1},
+                "verified": {"$sum": {"$cond": [{"$ifNull": ["$Q_id", False]}, 1, 0]}}
+            }},
+            {"$sort": {"_id": 1}}
+        ]
+        
+        return [
+            {
+                "day": day_label(doc["_id"]),
+                "day_number": doc["_id"],
+                "total": doc["total"],
+                "verified": doc["verified"],
+                "remaining": doc["total"] - doc["verified"]
+            }
+            for doc in collection.aggregate(pipeline)
+        ]
+    
+    @memoized
+    def get_day_question_summaries(self, subject, day_number, include_verified=False):
+        """Get lightweight summaries (no options/explanations) of a day's questions."""
+        collection = get_collection(f"{subject}_mcq")
+        self._ensure_day_fields(subject)
+        
+        query = {"day": int(day_number)}
+        if not include_verified:
+            query["Q_id"] = {"$exists": False}
+        
+        return list(collection.find(query, QUESTION_PROJECTIONS["summary"]).sort(DAY_ORDER))
+    
+    @memoized
+    def get_questions_by_ids(self, subject, question_ids, projection="full"):
+        """Get question documents for a set of ids in one query."""
+        collection = get_collection(f"{subject}_mcq")
+        return list(collection.find({"_id": {"$in": list(question_ids)}}, _projection(projection)))
+    
+    @memoized
+    def get_day_version(self, subject, day_number):
+        """Get the change stamp for a subject/day (bumped by every verify/modify)."""
+        version = get_collection("day_versions").find_one({"_id": f"{subject}:{int(day_number)}"})
+        return version["version"] if version else 0
+    
+    def _bump_day_version(self, subject, day):
+        """Mark a subject/day as changed so cached working sets revalidate."""
+        # Every question write goes through here, so it doubles as the cache invalidation hook
+        query_cache.invalidate(f"subject:{subject}", "subjects")
+        if day is None:
+            return
+        get_collection("day_versions").update_one(
+            {"_id": f"{subject}:{int(day)}"},
+            {"$inc": {"version": 1}, "$set": {"updated_at": datetime.now()}},
+            upsert=True
+        )
+    
+    def _bump_catalog(self, subject, field, day_counts):
+        """Add per-day counts to a subject's catalog totals ("total" or "verified")."""
+        increments = {field: sum(day_counts.values())}
+        for day, count in day_counts.items():
+            if day is not None:
+                increments[f"days.{int(day)}.{field}"] = count
+        if not increments[field]:
+            return
+        get_collection("subject_catalog").update_one(
+            {"_id": subject},
+            {
+                "$inc": increments,
+                "$set": {"updated_at": datetime.now()},
+                "$setOnInsert": {"code": SUBJECT_CODES.get(subject), "collection": f"{subject}_mcq"}
+            },
+            upsert=True
+        )
+    
+    @writes
+    def ingest_questions(self, subject, questions):
+        """Insert new questions, deriving numeric day/seq fields from Tags."""
+        collection = get_collection(f"{subject}_mcq")
+        
+        documents = []
+        for question in questions:
+            document = dict(question)
+            document.update(day_fields(document.get("Tags")))
+            documents.append(document)
+        
+        if not documents:
+            return 0
+        
+        result = collection.bulk_write([InsertOne(document) for document in documents], ordered=False)
+        day_counts = Counter(document["day"] for document in documents)
+        self._bump_catalog(subject, "total", day_counts)
+        for day in day_counts:
+            self._bump_day_version(subject, day)
+        return result.inserted_count
+    
+    def _ensure_day_fields(self, subject):
+        """Backfill day/seq before a day read if questions were imported without them."""
+        now = time.monotonic()
+        if now - _day_probes.get(subject, 0) < DAY_PROBE_INTERVAL:
+            return
+        _day_probes[subject] = now
+        # A missing day is part of the day index's null range, so the probe is one index seek
+        if get_collection(f"{subject}_mcq").find_one({"day": {"$exists": False}}, {"_id": 1}):
+            self.backfill_day_fields(subject)
+    
+    @writes
+    def backfill_day_fields(self, subject, batch_size=1000):
+        """Store day/seq parsed from Tags on questions that don't have them yet, counting them in the catalog."""
+        collection = get_collection(f"{subject}_mcq")
+        
+        updated = 0
+        totals = Counter()
+        verified = Counter()
+        while True:
+            # Already-converted documents drop out of the query, so re-runs resume naturally
+            batch = list(collection.find({"day": {"$exists": False}}, {"Tags": 1, "Q_id": 1}).limit(batch_size))
+            if not batch:
+                break
+            
+            operations = []
+            for question in batch:
+                fields = day_fields(question.get("Tags"))
+                totals[fields["day"]] += 1
+                if question.get("Q_id"):
+                    verified[fields["day"]] += 1
+                operations.append(UpdateOne({"_id": question["_id"]}, {"$set": fields}))
+            collection.bulk_write(operations, ordered=False)
+            updated += len(operations)
+        
+        # Every reconcile backfills before counting, so questions without day/seq are ones
+        # imported since: add them to the catalog like an ingest would
+        self._bump_catalog(subject, "total", totals)
+        self._bump_catalog(subject, "verified", verified)
+        # The questions just joined their days; cached working sets and day lists must reload
+        for day in totals:
+            self._bump_day_version(subject, day)
+        return updated
+    
+    @writes
+    def reverify_question(self, question_id, intern_id, action="reverified", changes=None, subject=None,
+                          idempotency_key=None):
         """Re-verify already verified question without changing Q_id."""
         from bson import ObjectId
         
-        # Find question in MCQ collections
-        for subject_key, subject_name in SUBJECTS.items():
-            source_collection = get_collection(f"{subject_name}_mcq")
-            question = source_collection.find_one({"_id": ObjectId(question_id)})
-            
+        if idempotency_key:
+            return self._run_idempotent(idempotency_key, action, lambda: self.reverify_question(
+                question_id, intern_id, action, changes, subject), payload=(question_id, changes))
+        
+        subject = subject or self.resolve_question_subject(question_id)
+        if not subject:
+            return False, "Question not found"
+        source_collection = get_collection(f"{subject}_mcq")
+        
+        # Only verified questions (with Q_id) can be re-verified; changes keep the existing Q_id
+        query = {"_id": ObjectId(question_id), "Q_id": {"$exists": True}}
+        if changes:
+            question = source_collection.find_one_and_update(
+                query, {"$set": changes}, projection={"Q_id": 1, "day": 1}, return_document=ReturnDocument.AFTER
+            )
             if question:
-                # Check if already verified (has Q_id)
-                existing_qid = question.get("Q_id")
-                if not existing_qid:
-                    return False, "Question not verified yet"
-                
-                # Update with changes but keep existing Q_id
-                if changes:
-                    source_collection.update_one(
-                        {"_id": ObjectId(question_id)},
-                        {"$set": changes}
-                    )
-                
-                # Log audit with existing Q_id - ensure Q_id is preserved
-                self._log_audit(existing_qid, intern_id, action, changes)
-                
-                return True, "Question re-verified successfully"
-        
-        return False, "Question not found"
+                self._bump_day_version(subject, question.get("day"))
+        else:
+            question = source_collection.find_one(query, {"Q_id": 1})
+        
+        if not question:
+            exists = source_collection.find_one({"_id": ObjectId(question_id)}, {"_id": 1})
+            return False, "Question not verified yet" if exists else "Question not found"
+        
+        # Log audit with existing Q_id - ensure Q_id is preserved
+        self._log_audit(question["Q_id"], intern_id, action, changes)
+        
+        return True, "Question re-verified successfully"
     
-    def generate_qid(self, subject_code, type_code):
-        """Generate unique Q_id by finding the highest existing number."""
-        audit_collection = get_collection("audit_collection")
+    def resolve_question_subject(self, question_id):
+        """Resolve the subject owning a question, probing collections only on LRU miss."""
+        from bson import ObjectId
         
-        # Count existing unique Q_ids for this subject+type
+        key = str(question_id)
+        with _question_subjects_lock:
+            if key in _question_subjects:
+                _question_subjects.move_to_end(key)
+                return _question_subjects[key]
+        
+        db = get_collection("users").database
+        object_id = ObjectId(question_id)
+        
+        def probe_subject(subject_name):
+            return db[f"{subject_name}_mcq"].find_one({"_id": object_id}, {"_id": 1}, max_time_ms=_FAN_OUT_TIMEOUT * 1000)
+        
+        # All subjects probed at once: one round trip of latency instead of up to 14
+        found, _ = self._fan_out(probe_subject, list(SUBJECTS.values()))
+        subject_name = next((subject for subject in SUBJECTS.values() if found.get(subject)), None)
+        if subject_name:
+            with _question_subjects_lock:
+                _question_subjects[key] = subject_name
+                _question_subjects.move_to_end(key)
+                while len(_question_subjects) > _QUESTION_SUBJECT_CACHE_SIZE:
+                    _question_subjects.popitem(last=False)
+        
+        return subject_name
+    
+    @writes
+    def generate_qid(self, subject_code, type_code):
+        """Generate unique Q_id from the atomic per-prefix counter."""
         prefix = f"{subject_code}{type_code}"
-        existing_qids = set()
-        
-        # Collect all unique Q_ids from all activity arrays
-        for intern_doc in audit_collection.find({}):
-            activity_arrays = [
-                intern_doc.get("activities", []),  # Old structure
-                intern_doc.get("verified_modified_activities", []),
-                intern_doc.get("reverified_remodified_activities", []),
-                intern_doc.get("other_activities", [])
-            ]
-            
-            for activities in activity_arrays:
-                for activity in activities:
-                    qid = str(activity.get("question_id", ""))
-                    if qid and qid.startswith(prefix):
-                        existing_qids.add(qid)
-        
-        # Find the highest number used
-        max_number = 0
-        for qid in existing_qids:
-            try:
-                # Extract number from Q_id (e.g., PYM001 -> 1)
-                number_part = qid[len(prefix):]
-                number = int(number_part)
-                max_number = max(max_number, number)
-            except (ValueError, IndexError):
+        number = self._reserve_qid_numbers(prefix)
+        return format_qid(prefix, number)
+    
+    def _reserve_qid_numbers(self, prefix, count=1):
+        """Reserve a contiguous block of Q_id numbers, returning the first one."""
+        counters_collection = get_collection("qid_counters")
+        
+        def increment():
+            # Only a seeded counter hands out numbers
+            return counters_collection.find_one_and_update(
+                {"_id": prefix, "seeded": True},
+                {"$inc": {"seq": count}},
+                return_document=ReturnDocument.AFTER
+            )
+        
+        counter = increment()
+        deadline = time.monotonic() + QID_SEED_LEASE
+        while counter is None:
+            # First use of this prefix: one caller aligns it with Q_ids issued before counters existed
+            if self._claim_qid_seed(prefix):
+                self.seed_qid_counters([prefix])
+            elif time.monotonic() > deadline:
+                raise RuntimeError(f"Q_id counter {prefix} is still being seeded; try again")
+            else:
+                time.sleep(0.1)
+            counter = increment()
+        
+        return counter["seq"] - count + 1
+    
+    def _claim_qid_seed(self, prefix):
+        """Take the right to seed an unseeded counter; False if another caller holds it."""
+        now = datetime.now()
+        try:
+            # Matches an unseeded counter whose seeding lease is free; otherwise the upsert collides on _id
+            get_collection("qid_counters").update_one(
+                {"_id": prefix, "seeded": {"$ne": True},
+                 "$or": [{"seeding_until": {"$exists": False}}, {"seeding_until": {"$lt": now}}]},
+                {"$set": {"seeding_until": now + timedelta(seconds=QID_SEED_LEASE)}},
+                upsert=True
+            )
+            return True
+        except DuplicateKeyError:
+            return False
+    
+    @writes
+    def seed_qid_counters(self, prefixes=None):
+        """Initialise/reconcile Q_id counters from existing Q_ids (never decreases them)."""
+        counters_collection = get_collection("qid_counters")
+        audit_events = get_collection("audit_events")
+        
+        max_numbers = {}
+        if prefixes:
+            max_numbers = {prefix: 0 for prefix in prefixes}
+        
+        def track(qid):
+            prefix, number = parse_qid(qid)
+            if prefix and (not prefixes or prefix in prefixes):
+                max_numbers[prefix] = max(max_numbers.get(prefix, 0), number)
+        
+        # Q_ids assigned to questions: backfill numeric Q_num where missing, then take the highest
+        for subject_code, subject_name in SUBJECTS.items():
+            if prefixes and not any(p.startswith(subject_code) for p in prefixes):
                 continue
+            collection = get_collection(f"{subject_name}_mcq")
+            updates = []
+            for question in collection.find({"Q_id": {"$exists": True}, "Q_num": {"$exists": False}}, {"Q_id": 1}):
+                _, number = parse_qid(question["Q_id"])
+                if number is not None:
+                    updates.append(UpdateOne({"_id": question["_id"]}, {"$set": {"Q_num": number}}))
+                if len(updates) >= 1000:
+                    collection.bulk_write(updates, ordered=False)
+                    updates = []
+            if updates:
+                collection.bulk_write(updates, ordered=False)
+            
+            # Q_num sorts numerically past 999 (PYM1000 after PYM999), unlike the Q_id string
+            latest = collection.find_one({"Q_id": {"$exists": True}}, {"Q_id": 1}, sort=[("Q_num", DESCENDING)])
+            if latest:
+                track(latest["Q_id"])
         
-        # Generate next number
-        next_number = max_number + 1
-        generated_qid = f"{prefix}{next_number:03d}"
-        
-        # Debug log
-        print(f"Generated Q_id: {generated_qid} (existing unique Q_ids: {len(existing_qids)}, max number: {max_number})")
-        
-        return generated_qid
+        # Q_ids recorded in audit history (covers questions that were re-imported)
+        pipeline = [
+            {"$group": {
+                "_id": {"$substrCP": ["$question_id", 0, 3]},
+                "max_number": {"$max": {"$convert": {
+                    "input": {"$substrCP": ["$question_id", 3, 12]},
+                    "to": "int", "onError": None, "onNull": None
+                }}}
+            }}
+        ]
+        if prefixes:
+            # Anchored regex on the question_id index: only this prefix's events are read
+            pipeline.insert(0, {"$match": {"question_id": {"$regex": f"^({'|'.join(sorted(prefixes))})"}}})
+        for doc in audit_events.aggregate(pipeline):
+            if doc["max_number"] is not None:
+                track(format_qid(doc["_id"], doc["max_number"]))
+        
+        for prefix, max_number in max_numbers.items():
+            counters_collection.update_one(
+                {"_id": prefix},
+                {
+                    "$max": {"seq": max_number},
+                    "$set": {"seeded": True, "seeded_at": datetime.now()},
+                    "$unset": {"seeding_until": ""}
+                },
+                upsert=True
+            )
+        
+        return max_numbers
     
-    def verify_question(self, question_id, intern_id, action="verified", changes=None):
-        """Verify MCQ question by adding Q_id to existing collection."""
+    @writes
+    def verify_question(self, question_id, intern_id, action="verified", changes=None, subject=None,
+                        idempotency_key=None):
+        """Verify MCQ question by adding Q_id in one conditional find-and-modify."""
         from bson import ObjectId
         
-        # Find original question in MCQ collections only
-        for subject_key, subject_name in SUBJECTS.items():
-            source_collection = get_collection(f"{subject_name}_mcq")
-            question = source_collection.find_one({"_id": ObjectId(question_id)})
-            
+        if idempotency_key:
+            return self._run_idempotent(idempotency_key, action, lambda: self.verify_question(
+                question_id, intern_id, action, changes, subject), payload=(question_id, changes))
+        
+        subject = subject or self.resolve_question_subject(question_id)
+        if not subject:
+            return False, "Question not found"
+        source_collection = get_collection(f"{subject}_mcq")
+        
+        # Reserve the Q_id up front; if the question turns out verified already it is recorded as a gap
+        q_id = self.generate_qid(SUBJECT_CODES[subject], "M")
+        _, q_num = parse_qid(q_id)
+        
+        # Q_num keeps numeric order past 999
+        update_data = {"Q_id": q_id, "Q_num": q_num}
+        if changes:
+            update_data.update(changes)
+        
+        # Only succeeds while the question is still unverified; returns the post-image
+        question = source_collection.find_one_and_update(
+            _unverified_filter(question_id),
+            {"$set": update_data},
+            projection={"Q_id": 1, "day": 1},
+            return_document=ReturnDocument.AFTER
+        )
+        
+        if question:
+            self._record_verification(subject, question.get("day"), q_id, intern_id, action, changes)
+            return True, f"Question verified as {q_id}"
+        
+        # Verified elsewhere (a race or a stale view); the reserved number is skipped, never reused
+        self._record_qid_gap(q_id)
+        
+        # Already verified: a modification still applies to the existing Q_id
+        if action == "modified" and changes:
+            question = source_collection.find_one_and_update(
+                {"_id": ObjectId(question_id), "Q_id": {"$exists": True}},
+                {"$set": changes},
+                projection={"Q_id": 1, "day": 1},
+                return_document=ReturnDocument.AFTER
+            )
             if question:
-                # Check if already verified (has Q_id)
-                existing_qid = question.get("Q_id")
-                if existing_qid:
-                    print(f"Question already verified with Q_id: {existing_qid}")
-                    # If it's a modification action, just log the audit with existing Q_id
-                    if action == "modified" and changes:
-                        # Update the question with changes but keep existing Q_id
-                        source_collection.update_one(
-                            {"_id": ObjectId(question_id)},
-                            {"$set": changes}
-                        )
-                        self._log_audit(existing_qid, intern_id, action, changes)
-                        return True
-                    return False
-                
-                # Generate new Q_id only if question doesn't have one
-                q_id = self.generate_qid(subject_key, "M")
-                
-                # Update the existing document with Q_id
-                update_data = {"Q_id": q_id}
-                if changes:
-                    update_data.update(changes)
-                
-                # Update the question in the same collection
-                source_collection.update_one(
-                    {"_id": ObjectId(question_id)},
-                    {"$set": update_data}
-                )
-                
-                # Log audit with the generated Q_id
-                self._log_audit(q_id, intern_id, action, changes)
-                
-                return True
-        return False
-    
-    def _log_audit(self, question_id, intern_id, action, changes=None):
-        """Log audit trail with categorized activities."""
-        audit_collection = get_collection("audit_collection")
+                self._bump_day_version(subject, question.get("day"))
+                self._log_audit(question["Q_id"], intern_id, action, changes)
+                return True, f"Question {question['Q_id']} updated"
+        
+        existing = source_collection.find_one({"_id": ObjectId(question_id)}, {"Q_id": 1})
+        if not existing:
+            return False, "Question not found"
+        return False, f"Question already verified as {existing.get('Q_id')}"
+    
+    def _record_verification(self, subject, day, q_id, intern_id, action, changes=None):
+        """Write a verify's catalog, day version, audit and progress updates concurrently."""
+        tasks = {
+            "catalog": lambda: self._bump_catalog(subject, "verified", {day: 1}),
+            "day_version": lambda: self._bump_day_version(subject, day),
+            "audit": lambda: self._log_audit(q_id, intern_id, action, changes, bump_progress=False),
+            "progress": lambda: self._bump_progress(intern_id, subject_for_qid(q_id), action),
+        }
+        
+        def verify_bookkeeping(name):
+            return tasks[name]()
+        
+        # Independent writes to four collections: one round trip of latency instead of four.
+        # The question is verified either way; a failed write here is logged by _fan_out and
+        # corrected by the catalog reconcile / progress rebuild
+        self._fan_out(verify_bookkeeping, list(tasks))
+    
+    def _record_qid_gap(self, q_id, count=1):
+        """Count reserved but unused Q_id numbers (count of them, from q_id on) on their prefix counter."""
+        prefix, _ = parse_qid(q_id)
+        get_collection("qid_counters").update_one({"_id": prefix}, {"$inc": {"gaps": count}})
+        print(f"Q_id {q_id}{f' (+{count - 1} more)' if count > 1 else ''} skipped: verified concurrently")
+    
+    def _run_idempotent(self, idempotency_key, operation, func, payload=None):
+        """Run a submission once per idempotency key; replays get the original result."""
+        keys_collection = get_collection("idempotency_keys")
+        # A key only replays the exact submission it was first used for
+        fingerprint = hashlib.sha256(
+            json.dumps([operation, payload], sort_keys=True, default=str).encode()
+        ).hexdigest()
+        
+        # One index probe both claims a new key and returns an existing record
+        try:
+            existing = keys_collection.find_one_and_update(
+                {"_id": idempotency_key},
+                {"$setOnInsert": {"operation": operation, "fingerprint": fingerprint, "status": "pending",
+                                  "created_at": datetime.now()}},
+                upsert=True,
+                return_document=ReturnDocument.BEFORE
+            )
+        except DuplicateKeyError:
+            existing = {"status": "pending", "fingerprint": fingerprint}
+        
+        if existing:
+            if existing.get("fingerprint") != fingerprint:
+                return False, "This submission key was already used for different content; please submit again"
+            if existing.get("status") == "done":
+                return tuple(existing["result"])
+            return False, "This submission is already being processed"
+        
+        try:
+            result = func()
+        except Exception:
+            # Release the key so the same submission can be retried
+            keys_collection.delete_one({"_id": idempotency_key})
+            raise
+        
+        keys_collection.update_one(
+            {"_id": idempotency_key},
+            {"$set": {"status": "done", "result": list(result)}}
+        )
+        return result
+    
+    def _with_retry(self, func, attempts=3, delay=0.2):
+        """Call func, retrying with backoff on transient connection errors."""
+        for attempt in range(attempts):
+            try:
+                return func()
+            except ConnectionFailure as e:
+                if attempt == attempts - 1:
+                    raise
+                print(f"Transient MongoDB error, retrying ({attempt + 1}/{attempts - 1}): {e}")
+                time.sleep(delay * (2 ** attempt))
+    
+    def _log_audit(self, question_id, intern_id, action, changes=None, bump_progress=True):
+        """Append one event to the audit_events store and (unless told not to) bump progress counters."""
+        audit_events = get_collection("audit_events")
         
         # Ensure question_id is not None or empty
         if not question_id:
             print(f"Warning: Empty question_id for action {action} by intern {intern_id}")
             return
         
-        # Create audit entry with guaranteed question_id
-        audit_entry = {
+        subject = subject_for_qid(question_id)
+        
+        # One document per event keeps intern history out of a single growing document
+        audit_event = {
+            "intern_id": intern_id,
             "question_id": str(question_id),
+            "subject": subject,
             "action": action,
             "timestamp": datetime.now()
         }
         if changes:
-            audit_entry["changes"] = changes
+            audit_event["changes"] = changes
         
-        # Determine which activity array to use
-        if action in ["verified", "modified"]:
-            activity_field = "verified_modified_activities"
-        elif action in ["reverified", "remodified"]:
-            activity_field = "reverified_remodified_activities"
-        else:
-            activity_field = "other_activities"
+        # insert_one assigns _id client-side, so a retried insert that already landed is a duplicate
+        try:
+            self._with_retry(lambda: audit_events.insert_one(audit_event))
+        except DuplicateKeyError:
+            pass
+        
+        # Keep per-intern, per-subject counters in step with the event log
+        if bump_progress:
+            self._bump_progress(intern_id, subject, action)
+    
+    def _log_audit_batch(self, question_ids, intern_id, action):
+        """Record one audit event per Q_id with a single insert_many."""
+        if not question_ids:
+            return
         
-        # Update or create intern document with categorized activities
-        audit_collection.update_one(
-            {"intern_id": intern_id},
+        now = datetime.now()
+        audit_events = [
             {
-                "$push": {activity_field: audit_entry},
-                "$set": {"last_activity": datetime.now()}
-            },
-            upsert=True
-        )
+                "intern_id": intern_id,
+                "question_id": str(question_id),
+                "subject": subject_for_qid(question_id),
+                "action": action,
+                "timestamp": now
+            }
+            for question_id in question_ids
+        ]
+        get_collection("audit_events").insert_many(audit_events, ordered=False)
+        
+        per_subject = {}
+        for event in audit_events:
+            per_subject[event["subject"]] = per_subject.get(event["subject"], 0) + 1
+        for subject, amount in per_subject.items():
+            self._bump_progress(intern_id, subject, action, amount)
+    
+    def _bump_progress(self, intern_id, subject, action, amount=1):
+        """Increment the intern's progress counter for a subject/action."""
+        if subject and action in PROGRESS_ACTIONS:
+            get_collection("progress_counters").update_one(
+                {"intern_id": intern_id, "subject": subject},
+                {"$inc": {action: amount}, "$set": {"updated_at": datetime.now()}},
+                upsert=True
+            )
+            query_cache.invalidate(f"progress:{intern_id}", "progress")
     
+    @memoized
+    @cached("metrics_ttl", tags=_progress_tags)
     def get_intern_stats(self, intern_id):
-        """Get intern performance statistics from categorized activities."""
-        audit_collection = get_collection("audit_collection")
+        """Get intern performance statistics from progress counters."""
+        counters_collection = get_collection("progress_counters")
         
-        intern_doc = audit_collection.find_one({"intern_id": intern_id})
-        result = {"verified": 0, "modified": 0, "reverified": 0, "remodified": 0}
-        
-        if intern_doc:
-            # Check both old and new activity structures for backward compatibility
-            all_activities = []
-            
-            # Old structure (for backward compatibility)
-            if "activities" in intern_doc:
-                all_activities.extend(intern_doc["activities"])
-            
-            # New categorized structure
-            if "verified_modified_activities" in intern_doc:
-                all_activities.extend(intern_doc["verified_modified_activities"])
-            if "reverified_remodified_activities" in intern_doc:
-                all_activities.extend(intern_doc["reverified_remodified_activities"])
-            if "other_activities" in intern_doc:
-                all_activities.extend(intern_doc["other_activities"])
-            
-            for activity in all_activities:
-                action = activity.get("action")
-                if action in result:
-                    result[action] += 1
+        result = {action: 0 for action in PROGRESS_ACTIONS}
+        for counter in counters_collection.find({"intern_id": intern_id}):
+            for action in PROGRESS_ACTIONS:
+                result[action] += counter.get(action, 0)
         
         return result
     
+    @writes
+    def rebuild_progress_counters(self, intern_id=None):
+        """Recompute progress counters from audit events to repair drift."""
+        audit_events = get_collection("audit_events")
+        counters_collection = get_collection("progress_counters")
+        
+        match = {"action": {"$in": PROGRESS_ACTIONS}, "subject": {"$ne": None}}
+        if intern_id:
+            match["intern_id"] = intern_id
+        
+        pipeline = [
+            {"$match": match},
+            {"$group": {
+                "_id": {"intern_id": "$intern_id", "subject": "$subject", "action": "$action"},
+                "count": {"$sum": 1}
+            }}
+        ]
+        
+        counters = {}
+        for doc in audit_events.aggregate(pipeline):
+            key = (doc["_id"]["intern_id"], doc["_id"]["subject"])
+            counter = counters.setdefault(key, {action: 0 for action in PROGRESS_ACTIONS})
+            counter[doc["_id"]["action"]] = doc["count"]
+        
+        now = datetime.now()
+        operations = [
+            ReplaceOne(
+                {"intern_id": key[0], "subject": key[1]},
+                {"intern_id": key[0], "subject": key[1], **counts, "updated_at": now},
+                upsert=True
+            )
+            for key, counts in counters.items()
+        ]
+        if operations:
+            counters_collection.bulk_write(operations, ordered=False)
+        
+        # Drop counters that no longer have any audit history behind them
+        stale_query = {"updated_at": {"$lt": now}}
+        if intern_id:
+            stale_query["intern_id"] = intern_id
+        removed = counters_collection.delete_many(stale_query).deleted_count
+        
+        return {"rebuilt": len(operations), "removed": removed}
+    
+    @memoized
+    @cached("questions_ttl", tags=_catalog_tags)
     def get_subject_question_count(self, subject):
         """Get total questions for a subject."""
-        try:
-            collection = get_collection(f"{subject}_mcq")
-            return collection.count_documents({})
-        except:
-            return 0
+        return self.get_subject_catalog().get(subject, {}).get("total", 0)
     
+    @memoized
+    @cached("metrics_ttl", tags=_catalog_tags)
     def get_verified_count(self, subject):
         """Get verified questions count for a subject."""
-        try:
-            collection = get_collection(f"{subject}_mcq")
-            return collection.count_documents({"Q_id": {"$exists": True}})
-        except:
-            return 0
+        return self.get_subject_catalog().get(subject, {}).get("verified", 0)
     
-    def get_verified_today_count(self):
-        """Get questions verified today from categorized audit structure."""
-        from datetime import datetime
-        today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    @memoized
+    @cached("questions_ttl", tags=["subjects"])
+    def get_subject_catalog(self, include_days=False):
+        """Get per-subject total/verified counts (optionally per-day counts) from subject_catalog."""
+        catalog_collection = get_collection("subject_catalog")
+        projection = None if include_days else {"days": 0}
+        
+        # Incremental updates can create entries before the first full count, so an empty
+        # catalog is not the signal; a completed full reconcile leaves a marker
+        if not get_collection("subject_catalog_state").find_one({"_id": "reconcile", "completed_at": {"$exists": True}}):
+            # One caller builds it; the rest read the partial catalog instead of recounting too
+            if self._claim_catalog_reconcile({"completed_at": {"$exists": False}}):
+                self.reconcile_subject_catalog()
+        else:
+            # Count questions imported since the last reconcile (one throttled probe per subject)
+            self._fan_out(self._ensure_day_fields, list(SUBJECTS.values()))
+        return {entry["_id"]: entry for entry in catalog_collection.find({}, projection)}
+    
+    @writes
+    def reconcile_subject_catalog(self, subjects=None):
+        """Backfill day/seq, recount subjects from their collections, correct the catalog and return any drift found.
+        
+        Subjects that could not be counted map to {"error": ...} and keep their catalog entry.
+        """
+        db = get_collection("subject_catalog").database
+        full_run = subjects is None
+        if subjects is None:
+            # Known subjects plus any other *_mcq collection
+            found = {name[:-len("_mcq")] for name in db.list_collection_names() if name.endswith("_mcq")}
+            subjects = sorted(found | set(SUBJECTS.values()))
         
-        audit_collection = get_collection("audit_collection")
-        count = 0
-        
-        # Count from all activity arrays
-        for intern_doc in audit_collection.find({}):
-            activity_arrays = [
-                intern_doc.get("activities", []),  # Old structure
-                intern_doc.get("verified_modified_activities", []),
-                intern_doc.get("reverified_remodified_activities", []),
-                intern_doc.get("other_activities", [])
-            ]
-            
-            for activities in activity_arrays:
-                for activity in activities:
-                    timestamp = activity.get("timestamp")
-                    action = activity.get("action")
-                    if timestamp and timestamp >= today and action in ["verified", "modified", "reverified", "remodified"]:
-                        count += 1
+        pipeline = [
+            {"$group": {
+                "_id": "$day",
+                "total": {"$sum": 1},
+                "verified": {"$sum": {"$cond": [{"$ifNull": ["$Q_id", False]}, 1, 0]}}
+            }}
+        ]
+        
+        def count_subject(subject):
+            # Questions imported outside the app have no day/seq yet; without them they are
+            # invisible to day queries, so derive them before counting
+            self.backfill_day_fields(subject)
+            return list(db[f"{subject}_mcq"].aggregate(pipeline, maxTimeMS=_FAN_OUT_TIMEOUT * 1000))
+        
+        # Subjects are counted in parallel; the catalog writes below are small
+        counts, failures = self._fan_out(count_subject, subjects)
+        drift = {subject: {"error": error} for subject, error in failures.items()}
         
-        return count
+        catalog = get_collection("subject_catalog")
+        previous_entries = {
+            entry["_id"]: entry
+            for entry in catalog.find({"_id": {"$in": list(counts)}}, {"total": 1, "verified": 1})
+        }
+        for subject, groups in counts.items():
+            days = {}
+            total = verified = 0
+            for doc in groups:
+                total += doc["total"]
+                verified += doc["verified"]
+                if doc["_id"] is not None:
+                    days[str(doc["_id"])] = {"total": doc["total"], "verified": doc["verified"]}
+            
+            previous = previous_entries.get(subject, {})
+            if previous.get("total", 0) != total or previous.get("verified", 0) != verified:
+                drift[subject] = {
+                    "total": (previous.get("total", 0), total),
+                    "verified": (previous.get("verified", 0), verified)
+                }
+            
+            catalog.replace_one({"_id": subject}, {
+                "_id": subject,
+                "code": SUBJECT_CODES.get(subject),
+                "collection": f"{subject}_mcq",
+                "total": total,
+                "verified": verified,
+                "days": days,
+                "updated_at": datetime.now(),
+                "reconciled_at": datetime.now()
+            }, upsert=True)
+        
+        if full_run:
+            get_collection("subject_catalog_state").update_one(
+                {"_id": "reconcile"},
+                {"$set": {"completed_at": datetime.now(), "failed": sorted(failures)},
+                 "$unset": {"running_until": ""}},
+                upsert=True
+            )
+        
+        query_cache.invalidate("subjects")
+        return drift
+    
+    @writes
+    def reconcile_subject_catalog_if_due(self, interval):
+        """Run a full reconcile unless one was claimed in the last interval seconds or is running (in any process).
+        
+        Picks up *_mcq collections and questions written outside the app. Returns the drift,
+        or None when it was not due.
+        """
+        now = datetime.now()
+        due = {"$or": [{"next_run": {"$exists": False}}, {"next_run": {"$lte": now}}]}
+        if not self._claim_catalog_reconcile(due, {"next_run": now + timedelta(seconds=interval)}):
+            return None
+        return self.reconcile_subject_catalog()
+    
+    def _claim_catalog_reconcile(self, condition, updates=None):
+        """Take the right to run a full reconcile; False if condition fails or another run holds the lease."""
+        now = datetime.now()
+        try:
+            # Matches only when condition holds and no reconcile is running; otherwise the upsert collides on _id
+            get_collection("subject_catalog_state").update_one(
+                {"_id": "reconcile", "$and": [
+                    condition,
+                    {"$or": [{"running_until": {"$exists": False}}, {"running_until": {"$lt": now}}]}
+                ]},
+                {"$set": {**(updates or {}), "running_until": now + timedelta(seconds=CATALOG_RECONCILE_LEASE)}},
+                upsert=True
+            )
+            return True
+        except DuplicateKeyError:
+            return False
     
-    def get_all_interns(self):
-        """Get all intern users."""
+    def _verified_today_pipeline(self):
+        """Aggregation counting today's progress events (index-backed on action, timestamp)."""
+        today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        return [
+            {"$match": {
+                "action": {"$in": PROGRESS_ACTIONS},
+                "timestamp": {"$gte": today}
+            }},
+            {"$group": {"_id": None, "count": {"$sum": 1}}}
+        ]
+    
+    @memoized
+    @cached("metrics_ttl", tags=["progress"])
+    def get_verified_today_count(self):
+        """Get questions verified today, counted server-side from today's audit events."""
+        audit_events = get_collection("audit_events")
+        result = list(audit_events.aggregate(self._verified_today_pipeline()))
+        return result[0]["count"] if result else 0
+    
+    @memoized
+    @cached("user_data_ttl", tags=["interns"])
+    def get_all_interns(self, projection="summary"):
+        """Get all intern users (without passwords)."""
         users_collection = get_collection("users")
-        return list(users_collection.find({"role": "intern"}))
+        return list(users_collection.find({"role": "intern"}, _projection(projection, USER_PROJECTIONS)))
     
+    @memoized
+    @cached("metrics_ttl", tags=["progress", "interns"])
     def get_top_interns(self, limit=5):
-        """Get top performing interns from categorized audit structure."""
-        audit_collection = get_collection("audit_collection")
-        users_collection = get_collection("users")
+        """Get top performing interns from progress counters with one aggregation."""
+        counters_collection = get_collection("progress_counters")
         
-        intern_stats = {}
-        
-        # Count from all activity arrays
-        for intern_doc in audit_collection.find({}):
-            intern_id = intern_doc.get("intern_id")
-            if intern_id:
-                count = 0
-                activity_arrays = [
-                    intern_doc.get("activities", []),  # Old structure
-                    intern_doc.get("verified_modified_activities", []),
-                    intern_doc.get("reverified_remodified_activities", []),
-                    intern_doc.get("other_activities", [])
-                ]
-                
-                for activities in activity_arrays:
-                    count += len([a for a in activities 
-                                if a.get("action") in ["verified", "modified", "reverified", "remodified"]])
-                
-                if count > 0:
-                    intern_stats[intern_id] = count
-        
-        # Sort and limit
-        sorted_interns = sorted(intern_stats.items(), key=lambda x: x[1], reverse=True)[:limit]
-        
-        results = []
-        for intern_id, verified_count in sorted_interns:
-            user = users_collection.find_one({"user_id": intern_id})
-            results.append({
-                "_id": intern_id,
-                "verified": verified_count,
-                "name": user["name"] if user else intern_id
-            })
+        pipeline = [
+            {"$group": {
+                "_id": "$intern_id",
+                "verified": {"$sum": {"$add": [
+                    {"$ifNull": [f"${action}", 0]} for action in PROGRESS_ACTIONS
+                ]}}
+            }},
+            {"$match": {"verified": {"$gt": 0}}},
+            {"$sort": {"verified": -1}},
+            {"$limit": limit},
+            {"$lookup": {
+                "from": "users",
+                "localField": "_id",
+                "foreignField": "user_id",
+                "as": "user"
+            }},
+            {"$project": {
+                "verified": 1,
+                "name": {"$ifNull": [{"$arrayElemAt": ["$user.name", 0]}, "$_id"]}
+            }}
+        ]
         
-        return results
+        return list(counters_collection.aggregate(pipeline))
     
+    @memoized
+    @cached("metrics_ttl", tags=["subjects"])
     def get_overall_completion_rate(self):
         """Calculate overall completion rate across all subjects."""
-        total_questions = 0
-        verified_count = 0
-        
-        # Count from each subject's MCQ collection
-        for subject in SUBJECTS.values():
-            try:
-                collection = get_collection(f"{subject}_mcq")
-                total_questions += collection.count_documents({})
-                verified_count += collection.count_documents({"Q_id": {"$exists": True}})
-            except:
-                continue
+        catalog = self.get_subject_catalog()
+        total_questions = sum(entry.get("total", 0) for entry in catalog.values())
+        verified_count = sum(entry.get("verified", 0) for entry in catalog.values())
         
         return (verified_count / total_questions * 100) if total_questions > 0 else 0.0
     
+    @writes
     def allocate_questions(self, intern_id, subjects, quotas):
         """Allocate questions to intern by updating user document."""
         users_collection = get_collection("users")
         
         # Get current allocated subjects
-        user = users_collection.find_one({"user_id": intern_id})
+        user = users_collection.find_one({"user_id": intern_id}, {"allocated_subjects": 1})
         if not user:
             return False
         
@@ -412,46 +1070,82 @@ class DatabaseService:
                 }
             }
         )
+        query_cache.invalidate(f"user:{intern_id}", "interns")
         
         return result.modified_count > 0
     
+    @memoized
+    @cached("metrics_ttl", tags=["interns", "subjects", "progress"])
     def get_current_allocations(self):
         """Get current question allocations from user documents."""
-        users_collection = get_collection("users")
-        
-        # Get all interns with allocated subjects
-        interns = list(users_collection.find({
-            "role": "intern",
-            "allocated_subjects": {"$exists": True, "$ne": []}
-        }))
-        
-        allocations = []
+        return [
+            {
+                "intern_id": row["user_id"],
+                "intern_name": row["name"],
+                "subjects": row["allocated_subjects"],
+                "total_quota": row["total_assigned"],
+                "completed": row["all_completed"]
+            }
+            for row in self.get_allocation_report()
+            if row["allocated_subjects"]
+        ]
+    
+    @memoized
+    @cached("metrics_ttl", tags=["interns", "subjects", "progress"])
+    def get_allocation_report(self):
+        """Build the intern x subject progress matrix in a fixed number of queries."""
+        interns = self.get_all_interns()
+        catalog = self.get_subject_catalog()
+        
+        # Every intern's counters in one indexed $in query
+        counters = {}
+        # Includes subjects an intern worked on before a reallocation
+        all_completed = Counter()
+        for counter in get_collection("progress_counters").find(
+            {"intern_id": {"$in": [intern["user_id"] for intern in interns]}}
+        ):
+            counters[(counter["intern_id"], counter["subject"])] = counter
+            all_completed[counter["intern_id"]] += counter.get("verified", 0) + counter.get("modified", 0)
+        
+        report = []
         for intern in interns:
-            subjects = intern.get("allocated_subjects", [])
-            if subjects:
-                # Calculate total questions
-                total_quota = 0
-                for subject in subjects:
-                    total_quota += self.get_subject_question_count(subject)
-                
-                # Get completed count
-                stats = self.get_intern_stats(intern["user_id"])
+            subjects = []
+            for subject in intern.get("allocated_subjects", []):
+                counter = counters.get((intern["user_id"], subject), {})
+                stats = {action: counter.get(action, 0) for action in PROGRESS_ACTIONS}
+                total = catalog.get(subject, {}).get("total", 0)
                 completed = stats["verified"] + stats["modified"]
-                
-                allocations.append({
-                    "intern_id": intern["user_id"],
-                    "intern_name": intern["name"],
-                    "subjects": subjects,
-                    "total_quota": total_quota,
-                    "completed": completed
+                subjects.append({
+                    "subject": subject,
+                    **stats,
+                    "total": total,
+                    "completed": completed,
+                    "remaining": total - completed,
+                    "progress": (completed / total * 100) if total > 0 else 0
                 })
+            
+            total_completed = sum(row["completed"] for row in subjects)
+            total_assigned = sum(row["total"] for row in subjects)
+            report.append({
+                "user_id": intern["user_id"],
+                "name": intern["name"],
+                "allocated_subjects": intern.get("allocated_subjects", []),
+                "last_allocation": intern.get("last_allocation"),
+                "subjects": subjects,
+                "total_completed": total_completed,
+                "total_assigned": total_assigned,
+                "overall_progress": (total_completed / total_assigned * 100) if total_assigned > 0 else 0,
+                "all_completed": all_completed[intern["user_id"]]
+            })
         
-        return allocations
+        return report
     
+    @memoized
+    @cached("user_data_ttl", tags=lambda intern_id: [f"user:{intern_id}", "subjects"])
     def get_intern_assignments(self, intern_id):
         """Get intern's current assignments from user document."""
         users_collection = get_collection("users")
-        user = users_collection.find_one({"user_id": intern_id})
+        user = users_collection.find_one({"user_id": intern_id}, {"allocated_subjects": 1})
         
         if user and user.get("allocated_subjects"):
             subjects = user["allocated_subjects"]
@@ -466,79 +1160,33 @@ class DatabaseService:
         
         return None
     
+    @memoized
+    @cached("metrics_ttl", tags=_progress_tags)
     def get_intern_subject_stats(self, intern_id, subject):
-        """Get intern stats for specific subject from categorized audit structure."""
-        audit_collection = get_collection("audit_collection")
-        
-        # Get subject code
-        subject_code = next((k for k, v in SUBJECTS.items() if v == subject), "XX")
-        
-        # Find intern document and count activities for this subject
-        intern_doc = audit_collection.find_one({"intern_id": intern_id})
-        result = {"verified": 0, "modified": 0, "reverified": 0, "remodified": 0}
-        
-        if intern_doc:
-            # Check all activity arrays
-            activity_arrays = [
-                intern_doc.get("activities", []),  # Old structure
-                intern_doc.get("verified_modified_activities", []),
-                intern_doc.get("reverified_remodified_activities", []),
-                intern_doc.get("other_activities", [])
-            ]
-            
-            for activities in activity_arrays:
-                for activity in activities:
-                    qid = activity.get("question_id", "")
-                    action = activity.get("action")
-                    # Check if question ID starts with subject code + M (for MCQ)
-                    if qid.startswith(f"{subject_code}M") and action in result:
-                        result[action] += 1
+        """Get intern stats for specific subject from progress counters."""
+        counters_collection = get_collection("progress_counters")
         
-        return result
+        # Single point lookup on the unique (intern_id, subject) index
+        counter = counters_collection.find_one({"intern_id": intern_id, "subject": subject}) or {}
+        return {action: counter.get(action, 0) for action in PROGRESS_ACTIONS}
     
+    @memoized
     def get_audit_logs(self, date_from=None, action=None, intern=None, limit=50):
-        """Get audit logs with filters from categorized structure."""
-        audit_collection = get_collection("audit_collection")
-        
-        # Get all intern documents
-        intern_docs = audit_collection.find({})
-        
-        all_activities = []
-        for intern_doc in intern_docs:
-            intern_id = intern_doc.get("intern_id")
-            
-            # Collect from all activity arrays (old and new structure)
-            activity_arrays = [
-                intern_doc.get("activities", []),  # Old structure
-                intern_doc.get("verified_modified_activities", []),
-                intern_doc.get("reverified_remodified_activities", []),
-                intern_doc.get("other_activities", [])
-            ]
-            
-            for activities in activity_arrays:
-                for activity in activities:
-                    # Add intern_id to each activity for filtering
-                    activity_with_intern = activity.copy()
-                    activity_with_intern["intern_id"] = intern_id
-                    
-                    # Apply filters
-                    if date_from and activity.get("timestamp"):
-                        if activity["timestamp"] < datetime.combine(date_from, datetime.min.time()):
-                            continue
-                    
-                    if action and activity.get("action") != action:
-                        continue
-                    
-                    if intern and intern_id != intern:
-                        continue
-                    
-                    all_activities.append(activity_with_intern)
-        
-        # Sort by timestamp descending and limit
-        all_activities.sort(key=lambda x: x.get("timestamp", datetime.min), reverse=True)
-        
-        return all_activities[:limit]
+        """Get audit logs with filters using indexed audit event queries."""
+        audit_events = get_collection("audit_events")
+        
+        query = {}
+        if date_from:
+            query["timestamp"] = {"$gte": datetime.combine(date_from, datetime.min.time())}
+        if action:
+            query["action"] = action
+        if intern:
+            query["intern_id"] = intern
+        
+        # Newest first; (intern_id, timestamp) and (action, timestamp) indexes cover the filters
+        return list(audit_events.find(query, {"_id": 0}).sort("timestamp", -1).limit(limit))
     
+    @memoized
     def get_first_unverified_question_index(self, subject):
         """Find the index of first unverified question."""
         collection = get_collection(f"{subject}_mcq")
@@ -547,13 +1195,14 @@ class DatabaseService:
         verified_count = collection.count_documents({"Q_id": {"$exists": True}})
         return verified_count + 1  # Start from next unverified question
     
+    @memoized
     def is_question_verified(self, question_id, subject):
         """Check if a question is already verified by checking if it has Q_id."""
         from bson import ObjectId
         
         # Get the question from source collection
         source_collection = get_collection(f"{subject}_mcq")
-        question = source_collection.find_one({"_id": ObjectId(question_id)})
+        question = source_collection.find_one({"_id": ObjectId(question_id)}, {"Q_id": 1})
         
         if not question:
             return False
@@ -561,16 +1210,71 @@ class DatabaseService:
         # Check if question has Q_id (verified)
         return question.get("Q_id") is not None
     
-    def get_question_batch(self, subject, batch_size=10):
+    @memoized
+    def get_question_batch(self, subject, batch_size=10, projection="editor"):
         """Get batch of questions for bulk verification."""
         collection = get_collection(f"{subject}_mcq")
-        return list(collection.find({}).limit(batch_size))
+        return list(collection.find({}, _projection(projection)).limit(batch_size))
     
-    def bulk_verify_clean_questions(self, subject, question_type, batch_size):
+    @writes
+    def bulk_verify_clean_questions(self, subject, question_type, batch_size, intern_id):
         """Bulk verify questions that meet quality criteria."""
-        # Simulate bulk verification
-        return {"verified": batch_size, "skipped": 0}
+        collection = get_collection(f"{subject}_mcq")
+        type_code = next((k for k, v in TYPES.items() if v == question_type), "M")
+        prefix = f"{SUBJECT_CODES[subject]}{type_code}"
+        
+        # Next clean unverified questions in day/sequence order; unclean ones are passed over
+        # in the query, so they never fill the batch and stall later runs
+        clean = list(collection.find(
+            {"Q_id": {"$exists": False}, **CLEAN_QUESTION_FILTER}, {"day": 1}
+        ).sort(DAY_ORDER).limit(batch_size))
+        if not clean:
+            return {"verified": 0, "skipped": 0}
+        
+        # One counter round trip reserves a contiguous block of Q_ids
+        first_number = self._reserve_qid_numbers(prefix, len(clean))
+        assigned = {}
+        operations = []
+        for offset, question in enumerate(clean):
+            number = first_number + offset
+            q_id = format_qid(prefix, number)
+            assigned[question["_id"]] = q_id
+            # Conditional on Q_id still missing, so concurrent sessions can't double-assign
+            operations.append(UpdateOne(
+                {"_id": question["_id"], "Q_id": {"$exists": False}},
+                {"$set": {"Q_id": q_id, "Q_num": number}}
+            ))
+        
+        try:
+            result = collection.bulk_write(operations, ordered=False)
+            modified = result.modified_count
+        except BulkWriteError as e:
+            print(f"Bulk verify write errors for {subject}: {len(e.details.get('writeErrors', []))}")
+            modified = e.details.get("nModified", 0)
+        
+        if modified == len(operations):
+            landed_ids = set(assigned)
+        else:
+            # Some questions were verified elsewhere meanwhile; keep only the Q_ids that landed
+            landed = collection.find(
+                {"_id": {"$in": list(assigned)}, "Q_id": {"$in": list(assigned.values())}},
+                {"_id": 1}
+            )
+            landed_ids = {q["_id"] for q in landed}
+        verified_qids = [assigned[question_id] for question_id in assigned if question_id in landed_ids]
+        lost_qids = [assigned[question_id] for question_id in assigned if question_id not in landed_ids]
+        if lost_qids:
+            self._record_qid_gap(lost_qids[0], len(lost_qids))
+        
+        self._log_audit_batch(verified_qids, intern_id, "verified")
+        self._bump_catalog(subject, "verified", Counter(q.get("day") for q in clean if q["_id"] in landed_ids))
+        for day in {question.get("day") for question in clean}:
+            self._bump_day_version(subject, day)
+        
+        # Skipped: verified by another session between our read and write
+        return {"verified": len(verified_qids), "skipped": len(clean) - len(verified_qids)}
     
+    @memoized
     def generate_verification_report(self, subject):
         """Generate verification report for subject."""
         total = self.get_subject_question_count(subject)
@@ -584,46 +1288,39 @@ class DatabaseService:
             "remaining": total - verified
         }
     
+    @memoized
+    @cached("questions_ttl", tags=["subjects"])
     def get_available_subjects(self):
-        """Get all available subjects with question counts from database."""
-        db = get_collection("users").database  # Get database reference
-        collections = db.list_collection_names()
-        
-        subjects = {}
-        for collection_name in collections:
-            if collection_name.endswith('_mcq'):
-                subject = collection_name.replace('_mcq', '')
-                count = db[collection_name].count_documents({})
-                if count > 0:
-                    subjects[subject] = count
-        
-        return subjects
+        """Get all available subjects with question counts from the subject catalog."""
+        return {
+            subject: entry["total"]
+            for subject, entry in self.get_subject_catalog().items()
+            if entry.get("total", 0) > 0
+        }
     
+    @memoized
+    @cached("metrics_ttl", tags=["subjects"])
     def get_verified_subjects(self):
-        """Get all verified subjects with counts from database."""
-        subjects = {}
-        
-        # Check each subject's MCQ collection for verified questions (those with Q_id)
-        for subject in SUBJECTS.values():
-            try:
-                collection = get_collection(f"{subject}_mcq")
-                count = collection.count_documents({"Q_id": {"$exists": True}})
-                if count > 0:
-                    subjects[subject] = count
-            except:
-                continue
-        
-        return subjects
+        """Get all verified subjects with counts from the subject catalog."""
+        return {
+            subject: entry["verified"]
+            for subject, entry in self.get_subject_catalog().items()
+            if entry.get("verified", 0) > 0
+        }
     
+    @memoized
+    @cached("user_data_ttl", tags=lambda intern_id: [f"user:{intern_id}"])
     def get_intern_allocated_subjects(self, intern_id):
         """Get subjects already allocated to an intern from user document."""
         users_collection = get_collection("users")
-        user = users_collection.find_one({"user_id": intern_id})
+        user = users_collection.find_one({"user_id": intern_id}, {"allocated_subjects": 1})
         
         if user:
             return user.get("allocated_subjects", [])
         return []
     
+    @memoized
+    @cached("user_data_ttl", tags=["interns", "subjects"])
     def get_unallocated_subjects(self):
         """Get subjects that are not allocated to any intern."""
         available_subjects = self.get_available_subjects()
@@ -631,7 +1328,7 @@ class DatabaseService:
         
         # Get all allocated subjects from all interns
         allocated_subjects = set()
-        interns = users_collection.find({"role": "intern", "allocated_subjects": {"$exists": True}})
+        interns = users_collection.find({"role": "intern", "allocated_subjects": {"$exists": True}}, {"allocated_subjects": 1})
         
         for intern in interns:
             subjects = intern.get("allocated_subjects", [])
@@ -641,6 +1338,15 @@ class DatabaseService:
         unallocated = {k: v for k, v in available_subjects.items() if k not in allocated_subjects}
         return unallocated
     
+    def get_cache_stats(self):
+        """Get query cache hit/miss counters per read method."""
+        return query_cache.stats()
+    
+    def clear_cache(self):
+        """Drop every cached read result."""
+        query_cache.clear()
+    
+    @writes
     def create_intern_user(self, name, email, allocated_subjects):
         """Create new intern user with allocated subjects."""
         users_collection = get_collection("users")
@@ -686,6 +1392,7 @@ class DatabaseService:
         
         # Insert user
         result = users_collection.insert_one(user_data)
+        query_cache.invalidate("interns")
         
         if result.inserted_id:
             return {
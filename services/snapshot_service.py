@@ -0,0 +1,165 @@
+"""Periodically materialised admin dashboard metrics shared by all admin sessions.
+
+A background worker per server process keeps one `dashboard_snapshots`
+document fresh. Refreshes take a lease lock on that document, so however many
+processes or admins ask at once, only one recomputes from the raw
+collections; the others keep serving the latest snapshot. The same worker
+reconciles the subject catalog every CATALOG_RECONCILE_INTERVAL seconds, so
+subjects and questions added outside the app show up without running the
+script by hand.
+"""
+import inspect
+import os
+import socket
+import threading
+import time
+from datetime import datetime, timedelta
+import streamlit as st
+from pymongo.errors import DuplicateKeyError, PyMongoError
+from config.database import get_collection
+from config.query_monitor import query_monitor
+from services.db_service import DatabaseService
+from utils.constants import CACHE_CONFIG
+
+SNAPSHOT_ID = "admin"
+# A refresh that takes longer than this is assumed dead and its lock can be taken over
+LEASE_SECONDS = 120
+
+def snapshot_interval():
+    """Seconds between snapshots (DASHBOARD_SNAPSHOT_INTERVAL, default metrics_ttl)."""
+    return int(os.getenv("DASHBOARD_SNAPSHOT_INTERVAL", CACHE_CONFIG["metrics_ttl"]))
+
+def catalog_reconcile_interval():
+    """Seconds between full subject catalog reconciles (CATALOG_RECONCILE_INTERVAL, default 1h)."""
+    return int(os.getenv("CATALOG_RECONCILE_INTERVAL", 3600))
+
+def snapshot_age(snapshot):
+    """Seconds since a snapshot was generated (None if there is none)."""
+    if not snapshot or not snapshot.get("generated_at"):
+        return None
+    return (datetime.now() - snapshot["generated_at"]).total_seconds()
+
+class SnapshotService:
+    """Compute, store and read the admin dashboard snapshot."""
+    def __init__(self, db_service=None):
+        self.db_service = db_service or DatabaseService()
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+        self.collection = get_collection("dashboard_snapshots")
+
+    def get_snapshot(self):
+        """Latest snapshot document, or None before the first refresh."""
+        return self.collection.find_one({"_id": SNAPSHOT_ID, "generated_at": {"$exists": True}})
+
+    def _fresh(self, method, *args, **kwargs):
+        """Call a DatabaseService read bypassing the query cache and rerun memo."""
+        return inspect.unwrap(getattr(DatabaseService, method))(self.db_service, *args, **kwargs)
+
+    def compute(self):
+        """Recompute header metrics and analytics from the database."""
+        catalog = self._fresh("get_subject_catalog")
+        subjects = [
+            {"subject": subject, "total": entry.get("total", 0), "verified": entry.get("verified", 0)}
+            for subject, entry in sorted(catalog.items())
+            if entry.get("total", 0) > 0
+        ]
+        total_questions = sum(row["total"] for row in subjects)
+        verified = sum(row["verified"] for row in subjects)
+
+        return {
+            "total_questions": total_questions,
+            "verified_today": self._fresh("get_verified_today_count"),
+            "active_interns": len(self._fresh("get_all_interns")),
+            "completion_rate": round((verified / total_questions * 100) if total_questions > 0 else 0, 1),
+            "subjects": subjects,
+            "top_interns": [
+                {"name": intern["name"], "verified": intern["verified"]}
+                for intern in self._fresh("get_top_interns", limit=5)
+            ]
+        }
+
+    def _acquire_lock(self):
+        """Take the refresh lease; False if another refresh holds it."""
+        now = datetime.now()
+        try:
+            # Matches an unlocked or expired snapshot; a locked one makes the upsert collide on _id
+            self.collection.update_one(
+                {"_id": SNAPSHOT_ID, "$or": [{"lock_until": {"$exists": False}}, {"lock_until": {"$lt": now}}]},
+                {"$set": {"lock_owner": self.owner, "lock_until": now + timedelta(seconds=LEASE_SECONDS)}},
+                upsert=True
+            )
+            return True
+        except DuplicateKeyError:
+            return False
+
+    def refresh(self, max_age=None):
+        """Recompute the snapshot under the lease lock; returns False if nothing was written.
+
+        With max_age, a snapshot younger than that (e.g. written by another
+        process while we waited for the lock) is kept as is.
+        """
+        if not self._acquire_lock():
+            return False
+
+        try:
+            if max_age is not None:
+                age = snapshot_age(self.get_snapshot())
+                if age is not None and age < max_age:
+                    return False
+
+            start = time.perf_counter()
+            snapshot = self.compute()
+            snapshot["generated_at"] = datetime.now()
+            snapshot["duration_ms"] = (time.perf_counter() - start) * 1000
+            snapshot["generated_by"] = self.owner
+
+            # Write and release in one update; skipped if our lease expired and was taken over
+            result = self.collection.update_one(
+                {"_id": SNAPSHOT_ID, "lock_owner": self.owner},
+                {"$set": snapshot, "$unset": {"lock_owner": "", "lock_until": ""}}
+            )
+            return result.matched_count == 1
+        finally:
+            self.collection.update_one(
+                {"_id": SNAPSHOT_ID, "lock_owner": self.owner},
+                {"$unset": {"lock_owner": "", "lock_until": ""}}
+            )
+
+class SnapshotWorker:
+    """Background thread keeping the dashboard snapshot and the subject catalog fresh."""
+    def __init__(self, interval, catalog_interval):
+        self.interval = interval
+        self.catalog_interval = catalog_interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="dashboard-snapshot-worker", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        # Background recomputes are not request latency; keep them out of the performance panel
+        query_monitor.ignore_current_thread()
+        service = SnapshotService()
+        while not self._stop.is_set():
+            try:
+                # Claimed through a shared schedule, so one process reconciles per interval
+                drift = service.db_service.reconcile_subject_catalog_if_due(self.catalog_interval)
+                if drift:
+                    print(f"Subject catalog: corrected {', '.join(sorted(drift))}")
+            except PyMongoError as e:
+                print(f"Subject catalog reconcile failed: {e}")
+            try:
+                # Every process runs a worker; max_age makes all but the first a no-op
+                service.refresh(max_age=self.interval * 0.9)
+            except PyMongoError as e:
+                print(f"Dashboard snapshot refresh failed: {e}")
+            self._stop.wait(self.interval)
+
+@st.cache_resource
+def start_snapshot_worker():
+    """Start one snapshot worker per server process."""
+    worker = SnapshotWorker(snapshot_interval(), catalog_reconcile_interval())
+    worker.start()
+    return worker
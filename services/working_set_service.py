@@ -0,0 +1,89 @@
+"""Session-scoped working set of one day's questions for the verification view."""
+import time
+from concurrent.futures import ThreadPoolExecutor
+import streamlit as st
+from pymongo.errors import PyMongoError
+from config.query_monitor import query_monitor
+from utils.constants import CACHE_CONFIG
+
+# Questions after the current one loaded in the background, so Next is served from session state
+PREFETCH_AHEAD = 2
+_prefetch_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="working-set-prefetch")
+
+class DayWorkingSet:
+    """Caches question summaries per (subject, day) and full documents around the current question."""
+    def __init__(self, db_service, subject, day_number, include_verified=False):
+        self.db_service = db_service
+        self.subject = subject
+        self.day_number = int(day_number)
+        self.include_verified = include_verified
+        self.key_prefix = f"working_set_{subject}_{self.day_number}_"
+        self.state_key = self.key_prefix + ("all" if include_verified else "open")
+
+    def summaries(self, force_refresh=False):
+        """Get the day's question summaries, revalidating against the day version stamp."""
+        entry = st.session_state.get(self.state_key)
+        now = time.time()
+
+        # Within the revalidation window navigation is served entirely from session state
+        if entry and not force_refresh and now - entry['checked_at'] < CACHE_CONFIG['working_set_revalidate']:
+            return entry['summaries']
+
+        version = self.db_service.get_day_version(self.subject, self.day_number)
+        if entry and not force_refresh and entry['version'] == version:
+            entry['checked_at'] = now
+            return entry['summaries']
+
+        summaries = self.db_service.get_day_question_summaries(
+            self.subject, self.day_number, include_verified=self.include_verified
+        )
+        st.session_state[self.state_key] = {
+            'version': version,
+            'checked_at': now,
+            'summaries': summaries,
+            'documents': {}
+        }
+        return summaries
+
+    def document(self, questions, index):
+        """Get the full document for questions[index], loading it with its neighbours on a miss."""
+        entry = st.session_state[self.state_key]
+        documents = entry['documents']
+        question_id = questions[index]['_id']
+        self._collect_prefetch(entry)
+
+        if question_id not in documents:
+            window = questions[max(0, index - 1):index + 2]
+            missing = [q['_id'] for q in window if q['_id'] not in documents]
+            for doc in self.db_service.get_questions_by_ids(self.subject, missing, projection="editor"):
+                documents[doc['_id']] = doc
+
+        # Hit or miss, start loading the next questions while the intern reads this one
+        ahead = [q['_id'] for q in questions[index + 1:index + 1 + PREFETCH_AHEAD] if q['_id'] not in documents]
+        if ahead:
+            entry['prefetch'] = _prefetch_pool.submit(self._prefetch, query_monitor.capture(), ahead)
+
+        # Fall back to the summary if the question disappeared since the summaries were loaded
+        return documents.get(question_id, questions[index])
+
+    def _prefetch(self, context, question_ids):
+        """Load documents on a pool thread, credited to the view that asked for them."""
+        with query_monitor.attach(context):
+            return self.db_service.get_questions_by_ids(self.subject, question_ids, projection="editor")
+
+    def _collect_prefetch(self, entry):
+        """Merge a background prefetch into the cached documents (waiting if it is still running)."""
+        future = entry.pop('prefetch', None)
+        if future is None:
+            return
+        try:
+            for doc in future.result():
+                entry['documents'][doc['_id']] = doc
+        except PyMongoError as e:
+            # The question is loaded synchronously instead
+            print(f"Working set prefetch failed: {e}")
+
+    def invalidate(self):
+        """Drop cached data for this subject/day in every mode (after this session writes)."""
+        for state_key in [k for k in st.session_state.keys() if str(k).startswith(self.key_prefix)]:
+            del st.session_state[state_key]
@@ -8,9 +8,15 @@ SUBJECTS = {
     "DV": "devops", "AP": "aptitude", "SS": "softskills"
 }
 
+# Reverse lookup: subject name -> subject code
+SUBJECT_CODES = {name: code for code, name in SUBJECTS.items()}
+
 # Question types (MCQ only)
 TYPES = {"M": "mcq"}
 
+# Audit actions counted as intern progress
+PROGRESS_ACTIONS = ["verified", "modified", "reverified", "remodified"]
+
 # Role-based permissions
 ROLES = {
     "admin": ["allocate", "audit", "manage", "export", "analytics"],
@@ -21,9 +27,14 @@ ROLES = {
 CACHE_CONFIG = {
     "questions_ttl": 300,
     "user_data_ttl": 1800,
-    "metrics_ttl": 60
+    "metrics_ttl": 60,
+    "working_set_revalidate": 30,
+    "max_entries": 1024
 }
 
+# How long verify/modify idempotency keys are remembered (seconds)
+IDEMPOTENCY_TTL = 86400
+
 # Pagination settings
 PAGINATION = {
     "default_page_size": 50,
@@ -0,0 +1,24 @@
+"""Q_id formatting and parsing helpers."""
+import re
+from utils.constants import SUBJECTS
+
+# Q_id layout: <subject code><type code><number>, e.g. PYM001, JSM1042
+QID_PATTERN = re.compile(r"^([A-Z]{2})([A-Z])(\d+)$")
+
+def format_qid(prefix, number):
+    """Build a Q_id from its prefix and sequence number (min 3 digits)."""
+    return f"{prefix}{number:03d}"
+
+def parse_qid(qid):
+    """Split a Q_id into (prefix, number); returns (None, None) if malformed."""
+    match = QID_PATTERN.match(str(qid or ""))
+    if not match:
+        return None, None
+    return match.group(1) + match.group(2), int(match.group(3))
+
+def subject_for_qid(qid):
+    """Get subject name (e.g. python) from a Q_id, or None."""
+    prefix, _ = parse_qid(qid)
+    if not prefix:
+        return None
+    return SUBJECTS.get(prefix[:2])
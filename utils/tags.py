@@ -0,0 +1,22 @@
+"""Helpers for the day/sequence Tags format (e.g. day-3:12)."""
+import re
+
+DAY_TAG_PATTERN = re.compile(r"^\s*day-(\d+)(?::(\d+))?", re.IGNORECASE)
+
+def parse_day_tag(tag):
+    """Parse 'day-3:12' into (3, 12); missing parts come back as None."""
+    match = DAY_TAG_PATTERN.match(str(tag or ""))
+    if not match:
+        return None, None
+    day = int(match.group(1))
+    seq = int(match.group(2)) if match.group(2) else None
+    return day, seq
+
+def day_fields(tag):
+    """Numeric fields stored alongside Tags for indexed, correctly ordered day queries."""
+    day, seq = parse_day_tag(tag)
+    return {"day": day, "seq": seq}
+
+def day_label(day):
+    """Format a day number as its tag prefix (e.g. day-3)."""
+    return f"day-{day}"
@@ -2,8 +2,12 @@
 import streamlit as st
 from services.db_service import DatabaseService
 from services.auth_service import AuthService
+from services.change_stream_watcher import start_change_stream_watcher
+from services.snapshot_service import SnapshotService, snapshot_age
+from config.query_monitor import query_monitor
 from utils.constants import SUBJECTS
 from datetime import datetime, timedelta
+from pymongo.errors import PyMongoError
 
 def show_admin_dashboard(auth_service=None):
     """Display comprehensive admin dashboard."""
@@ -25,30 +29,49 @@ def show_admin_dashboard(auth_service=None):
             auth_service.logout_user()
             st.rerun()
     
-    # Quick Stats
-    col1, col2, col3, col4 = st.columns(4)
+    # Quick Stats come from the shared snapshot, refreshed in the background
+    snapshot = get_dashboard_snapshot(db_service)
     
-    with col1:
-        total_questions = get_total_questions(db_service)
-        st.metric("Total Questions", f"{total_questions:,}", "↗️ Active")
+    if snapshot:
+        col1, col2, col3, col4 = st.columns(4)
+        
+        with col1:
+            st.metric("Total Questions", f"{snapshot['total_questions']:,}", "↗️ Active")
+        
+        with col2:
+            st.metric("Verified Today", snapshot['verified_today'], "+12")
+        
+        with col3:
+            st.metric("Active Interns", snapshot['active_interns'], "+2")
+        
+        with col4:
+            st.metric("Completion Rate", f"{snapshot['completion_rate']}%", "+3%")
     
+    col1, col2 = st.columns([5, 1])
+    with col1:
+        if snapshot:
+            st.caption(f"📸 Snapshot from {snapshot['generated_at'].strftime('%H:%M:%S')} "
+                       f"({snapshot_age(snapshot):.0f}s ago, computed in {snapshot['duration_ms']:.0f} ms)")
+        else:
+            st.info("⏳ Dashboard snapshot not ready yet; it is being computed in the background.")
     with col2:
-        verified_today = get_verified_today(db_service)
-        st.metric("Verified Today", verified_today, "+12")
-    
-    with col3:
-        active_interns = get_active_interns(db_service)
-        st.metric("Active Interns", active_interns, "+2")
-    
-    with col4:
-        completion_rate = get_completion_rate(db_service)
-        st.metric("Completion Rate", f"{completion_rate}%", "+3%")
+        if st.button("🔄 Refresh now", key="refresh_snapshot"):
+            try:
+                if SnapshotService(db_service).refresh():
+                    st.rerun()
+                else:
+                    st.info("A refresh is already running; showing the latest snapshot.")
+            except PyMongoError as e:
+                st.error(f"Snapshot refresh failed: {e}")
     
     # Tabs for different sections
-    tab1, tab2, tab3, tab4, tab5 = st.tabs(["📈 Analytics", "👥 Intern Management", "📊 Intern Progress", "📋 Collections", "⚙️ Settings"])
+    tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs(["📈 Analytics", "👥 Intern Management", "📊 Intern Progress", "📋 Collections", "⚙️ Settings", "⚡ Database Performance"])
     
     with tab1:
-        show_analytics_section(db_service)
+        if snapshot:
+            show_analytics_section(snapshot)
+        else:
+            st.info("⏳ Analytics will appear once the first dashboard snapshot is ready.")
     
     with tab2:
         show_intern_management(db_service)
@@ -60,11 +83,22 @@ def show_admin_dashboard(auth_service=None):
         show_collections_overview(db_service)
     
     with tab5:
-        show_system_settings()
+        show_system_settings(db_service)
+    
+    with tab6:
+        show_database_performance()
     
 
 
-def show_analytics_section(db_service):
+def get_dashboard_snapshot(db_service):
+    """Get the latest dashboard snapshot; None until the background worker has written one."""
+    try:
+        return SnapshotService(db_service).get_snapshot()
+    except PyMongoError as e:
+        st.error(f"Could not load the dashboard snapshot: {e}")
+        return None
+
+def show_analytics_section(snapshot):
     """Display analytics and performance metrics."""
     st.subheader("📈 Performance Analytics")
     
@@ -73,20 +107,16 @@ def show_analytics_section(db_service):
     with col1:
         st.markdown("**Verification Progress by Subject**")
         
-        # Get actual subjects from database
-        available_subjects = db_service.get_available_subjects()
-        
-        if available_subjects:
-            for subject, total in available_subjects.items():
-                verified = db_service.get_verified_count(subject)
-                progress = (verified / total * 100) if total > 0 else 0
-                st.progress(progress / 100, text=f"{subject.title()}: {progress:.1f}%")
+        if snapshot['subjects']:
+            for row in snapshot['subjects']:
+                progress = (row['verified'] / row['total'] * 100) if row['total'] > 0 else 0
+                st.progress(progress / 100, text=f"{row['subject'].title()}: {progress:.1f}%")
         else:
             st.info("No subjects found in database")
     
     with col2:
         st.markdown("**Top Performing Interns**")
-        top_interns = db_service.get_top_interns(limit=5)
+        top_interns = snapshot['top_interns']
         
         if top_interns:
             for i, intern in enumerate(top_interns, 1):
@@ -241,71 +271,49 @@ def show_intern_progress_section(db_service):
     """Display detailed progress for each intern."""
     st.subheader("📊 Individual Intern Progress")
     
-    # Get all interns
-    interns = db_service.get_all_interns()
+    # Whole intern x subject matrix in a constant number of queries
+    report = db_service.get_allocation_report()
     
-    if not interns:
+    if not report:
         st.info("No interns found in the system.")
         return
     
-    for intern in interns:
+    for intern in report:
         with st.expander(f"👨‍💻 {intern['name']} ({intern['user_id']})", expanded=True):
             col1, col2 = st.columns([2, 1])
             
             with col1:
-                # Get intern's allocated subjects
-                allocated_subjects = intern.get('allocated_subjects', [])
-                
-                if not allocated_subjects:
+                if not intern['subjects']:
                     st.warning("No subjects allocated to this intern")
                     continue
                 
                 st.markdown("**Subject-wise Progress:**")
                 
-                total_verified = 0
-                total_assigned = 0
-                
-                for subject in allocated_subjects:
-                    # Get subject stats
-                    subject_stats = db_service.get_intern_subject_stats(intern['user_id'], subject)
-                    total_questions = db_service.get_subject_question_count(subject)
-                    
-                    verified = subject_stats['verified']
-                    modified = subject_stats['modified']
-                    reverified = subject_stats['reverified']
-                    remodified = subject_stats['remodified']
-                    completed = verified + modified
-                    
-                    total_verified += completed
-                    total_assigned += total_questions
-                    
-                    # Progress bar
-                    progress = (completed / total_questions * 100) if total_questions > 0 else 0
-                    
-                    st.write(f"**{subject.title()}:**")
-                    st.progress(progress / 100, text=f"{completed}/{total_questions} ({progress:.1f}%)")
+                for row in intern['subjects']:
+                    st.write(f"**{row['subject'].title()}:**")
+                    st.progress(min(row['progress'], 100) / 100, text=f"{row['completed']}/{row['total']} ({row['progress']:.1f}%)")
                     
                     # Details
                     col_a, col_b, col_c, col_d, col_e = st.columns(5)
                     with col_a:
-                        st.metric("Verified", verified)
+                        st.metric("Verified", row['verified'])
                     with col_b:
-                        st.metric("Modified", modified)
+                        st.metric("Modified", row['modified'])
                     with col_c:
-                        st.metric("Re-verified", reverified)
+                        st.metric("Re-verified", row['reverified'])
                     with col_d:
-                        st.metric("Re-modified", remodified)
+                        st.metric("Re-modified", row['remodified'])
                     with col_e:
-                        st.metric("Remaining", total_questions - completed)
+                        st.metric("Remaining", row['remaining'])
             
             with col2:
                 st.markdown("**Overall Stats:**")
                 
                 # Overall progress
-                overall_progress = (total_verified / total_assigned * 100) if total_assigned > 0 else 0
+                overall_progress = intern['overall_progress']
                 st.metric("Overall Progress", f"{overall_progress:.1f}%")
-                st.metric("Total Completed", total_verified)
-                st.metric("Total Assigned", total_assigned)
+                st.metric("Total Completed", intern['total_completed'])
+                st.metric("Total Assigned", intern['total_assigned'])
                 
                 # Status indicator
                 if overall_progress >= 90:
@@ -344,7 +352,7 @@ def show_collections_overview(db_service):
         verified_found = False
         if available_subjects:
             for subject in available_subjects.keys():
-                verified_count = db_service.get_verified_count(subject)
+                verified_count = verified_subjects.get(subject, 0)
                 if verified_count > 0:
                     st.write(f"• **{subject.title()}**: {verified_count:,} verified")
                     verified_found = True
@@ -352,7 +360,7 @@ def show_collections_overview(db_service):
         if not verified_found:
             st.info("No verified collections found")
 
-def show_system_settings():
+def show_system_settings(db_service):
     """Display system configuration settings."""
     st.subheader("⚙️ System Settings")
     
@@ -385,6 +393,107 @@ def show_system_settings():
             "✅ **Enabled**: Sequential unlocking\n"
             "❌ **Disabled**: All days available"
         )
+    
+    st.markdown("**Query Cache**")
+    
+    cache_stats = db_service.get_cache_stats()
+    methods = cache_stats["methods"]
+    total_hits = sum(m["hits"] for m in methods.values())
+    total_misses = sum(m["misses"] for m in methods.values())
+    lookups = total_hits + total_misses
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Entries", f"{cache_stats['entries']} / {cache_stats['max_entries']}")
+    with col2:
+        st.metric("Hit Rate", f"{total_hits / lookups * 100:.1f}%" if lookups else "-")
+    with col3:
+        if st.button("🧹 Clear Cache"):
+            db_service.clear_cache()
+            st.rerun()
+    
+    watcher = start_change_stream_watcher()
+    if watcher:
+        st.caption(f"Cross-process invalidation: change streams {watcher.status} ({watcher.events_seen} events)")
+    else:
+        st.caption("Cross-process invalidation: TTL only (set ENABLE_CHANGE_STREAMS=true to enable change streams)")
+    
+    if methods:
+        cache_data = [
+            {"Method": name, "Hits": m["hits"], "Misses": m["misses"],
+             "Evictions": m["evictions"], "Invalidations": m["invalidations"]}
+            for name, m in sorted(methods.items())
+        ]
+        st.dataframe(cache_data, use_container_width=True)
+
+def show_database_performance():
+    """Display per-method MongoDB latency, slow queries and per-rerun query counts."""
+    st.subheader("⚡ Database Performance")
+    
+    def fmt_ms(value):
+        return f"{value:.1f}" if value is not None else "-"
+    
+    methods = query_monitor.method_summary()
+    overall = query_monitor.overall_percentiles()
+    slow_queries, reruns = query_monitor.snapshot()
+    
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Commands", sum(row["calls"] for row in methods))
+    with col2:
+        st.metric("p50 (ms)", fmt_ms(overall[50]))
+    with col3:
+        st.metric("p95 (ms)", fmt_ms(overall[95]))
+    with col4:
+        st.metric("p99 (ms)", fmt_ms(overall[99]))
+    
+    st.caption(f"Since {datetime.fromtimestamp(query_monitor.started_at).strftime('%Y-%m-%d %H:%M:%S')} (this server process)")
+    if st.button("🔄 Reset Statistics", key="reset_query_monitor"):
+        query_monitor.reset()
+        st.rerun()
+    
+    st.markdown("**By DatabaseService Method**")
+    if methods:
+        st.dataframe([
+            {"Method": row["method"], "Calls": row["calls"], "Total (ms)": fmt_ms(row["total_ms"]),
+             "p50 (ms)": fmt_ms(row["p50_ms"]), "p95 (ms)": fmt_ms(row["p95_ms"]),
+             "p99 (ms)": fmt_ms(row["p99_ms"]), "Max (ms)": fmt_ms(row["max_ms"]),
+             "Documents": row["documents"], "KB": f"{row['kb']:.1f}", "Failures": row["failures"]}
+            for row in methods
+        ], use_container_width=True)
+    else:
+        st.info("No database commands recorded yet.")
+    
+    st.markdown("**By View**")
+    view_rows = query_monitor.view_summary()
+    if view_rows:
+        st.dataframe([
+            {"View": row["view"], "Commands": row["calls"], "Total (ms)": fmt_ms(row["total_ms"])}
+            for row in view_rows
+        ], use_container_width=True)
+    
+    st.markdown(f"**Slowest Queries (top {len(slow_queries)})**")
+    if slow_queries:
+        st.dataframe([
+            {"Duration (ms)": fmt_ms(q["duration_ms"]), "Method": q["method"], "View": q["view"],
+             "Command": q["command"], "Collection": q["collection"] or "-",
+             "Documents": q["documents"], "KB": f"{q['bytes'] / 1024:.1f}",
+             "At": datetime.fromtimestamp(q["at"]).strftime('%H:%M:%S')}
+            for q in slow_queries
+        ], use_container_width=True)
+    
+    st.markdown("**Recent Reruns**")
+    if reruns:
+        avg_queries = sum(r["queries"] for r in reruns) / len(reruns)
+        avg_deduplicated = sum(r.get("deduplicated", 0) for r in reruns) / len(reruns)
+        st.caption(f"Average {avg_queries:.1f} queries and {avg_deduplicated:.1f} deduplicated calls per rerun over the last {len(reruns)} reruns")
+        st.dataframe([
+            {"At": datetime.fromtimestamp(r["at"]).strftime('%H:%M:%S'), "Page": r["label"],
+             "Queries": r["queries"], "Deduplicated": r.get("deduplicated", 0),
+             "Duration (ms)": fmt_ms(r.get("duration_ms")),
+             "Top Methods": ", ".join(f"{m}×{n}" for m, n in sorted(r["by_method"].items(), key=lambda i: -i[1])[:3])}
+            for r in reversed(reruns)
+        ], use_container_width=True)
 
 def update_env_setting(key, value):
     """Update environment variable in .env file."""
@@ -462,23 +571,5 @@ def show_audit_logs(db_service):
                 st.write("**Changes**:")
                 st.json(log['changes'])
 
-# Helper functions
-def get_total_questions(db_service):
-    """Get total questions across all subjects."""
-    available_subjects = db_service.get_available_subjects()
-    return sum(available_subjects.values()) if available_subjects else 0
-
-def get_verified_today(db_service):
-    """Get questions verified today."""
-    return db_service.get_verified_today_count()
-
-def get_active_interns(db_service):
-    """Get count of active interns."""
-    return len(db_service.get_all_interns())
-
-def get_completion_rate(db_service):
-    """Calculate overall completion rate."""
-    return round(db_service.get_overall_completion_rate(), 1)
-
 if __name__ == "__main__":
     show_admin_dashboard()
\ No newline at end of file
@@ -1,7 +1,9 @@
 """Intern dashboard with multi-subject verification interface."""
+import uuid
 import streamlit as st
 from services.db_service import DatabaseService
 from services.auth_service import AuthService
+from services.working_set_service import DayWorkingSet
 from utils.constants import SUBJECTS
 
 def show_intern_dashboard(auth_service=None):
@@ -176,8 +178,14 @@ def show_day_selection(db_service, subject):
     else:
         st.markdown("### 📅 Select Day to Verify")
     
-    # Get available days
-    days = db_service.get_available_days(subject, include_verified=reverify_mode)
+    # Total/verified/remaining for every day in one round trip
+    days_progress = db_service.get_days_progress(subject)
+    
+    # Reverify needs days with verified questions; verification needs days with work left
+    if reverify_mode:
+        days = [d for d in days_progress if d['verified'] > 0]
+    else:
+        days = [d for d in days_progress if d['remaining'] > 0]
     
     if not days:
         if reverify_mode:
@@ -189,16 +197,7 @@ def show_day_selection(db_service, subject):
     # Filter days based on mode requirements
     if reverify_mode:
         # Only show days with verified questions
-        valid_days = []
-        for day in days:
-            day_num = day.replace('day-', '')
-            stats = db_service.get_day_stats(subject, day_num)
-            if stats['verified'] > 0:
-                valid_days.append((day, stats))
-        
-        if not valid_days:
-            st.info("No days with verified questions found.")
-            return
+        valid_days = [(d['day'], d) for d in days]
         
         # Display only valid days
         cols = st.columns(min(len(valid_days), 4))
@@ -217,18 +216,8 @@ def show_day_selection(db_service, subject):
                     st.rerun()
     else:
         # Sequential day unlocking - only enable next day after current is completed
-        all_day_stats = []
-        for day in days:
-            day_num = day.replace('day-', '')
-            stats = db_service.get_day_stats(subject, day_num)
-            all_day_stats.append((day, day_num, stats))
-        
-        # Sort by day number (convert to int for proper sorting)
-        all_day_stats.sort(key=lambda x: int(x[1]) if x[1].isdigit() else 999)
-        
-        if not all_day_stats:
-            st.info("No questions found for this subject.")
-            return
+        # (already in numeric day order from the aggregation)
+        all_day_stats = [(d['day'], str(d['day_number']), d) for d in days]
         
         # Check if day locking is enabled
         import os
@@ -350,11 +339,13 @@ def show_day_verification_interface(db_service, intern_id, subject):
         if st.button("🔙 Back to Days"):
             if 'selected_day' in st.session_state:
                 del st.session_state['selected_day']
+            reset_submission_keys()
             st.rerun()
     
-    # Get day questions based on mode
+    # Get day question summaries based on mode (cached per session, revalidated by day version)
     reverify_mode = st.session_state.get('reverify_mode', False)
-    questions = db_service.get_day_questions(subject, selected_day, include_verified=reverify_mode)
+    working_set = DayWorkingSet(db_service, subject, selected_day, include_verified=reverify_mode)
+    questions = working_set.summaries()
     
     # Filter questions based on mode
     if reverify_mode:
@@ -379,7 +370,8 @@ def show_day_verification_interface(db_service, intern_id, subject):
         st.session_state[session_key] = 1
         current_index = 0
     
-    question = questions[current_index]
+    # Full document only for the current question (neighbours are prefetched with it)
+    question = working_set.document(questions, current_index)
     
     editor = QuestionEditor()
     
@@ -401,6 +393,7 @@ def show_day_verification_interface(db_service, intern_id, subject):
             st.info(f"⚪ {difficulty}")
     with col3:
         if st.button("🔄 Refresh"):
+            working_set.invalidate()
             st.rerun()
     
     # Check if in edit mode
@@ -429,6 +422,7 @@ def show_day_verification_interface(db_service, intern_id, subject):
                 # Update session state if selection changed
                 if selected_index != current_index:
                     st.session_state[session_key] = selected_index + 1
+                    reset_submission_keys()
                     st.rerun()
                 
                 # Show selected question details
@@ -599,15 +593,19 @@ def show_day_verification_interface(db_service, intern_id, subject):
                                 str(question['_id']), 
                                 intern_id, 
                                 "remodified",
-                                changes
+                                changes,
+                                subject=subject,
+                                idempotency_key=get_submission_key("remodify", question['_id'])
                             )
                             if success:
                                 st.success("🔄 Question re-modified!")
+                                working_set.invalidate()
                                 st.session_state[session_key] = min(st.session_state[session_key] + 1, len(questions))
                                 if edit_mode_key in st.session_state:
                                     del st.session_state[edit_mode_key]
                                 st.rerun()
                             else:
+                                rotate_submission_key("remodify", question['_id'])
                                 st.error(f"❌ {message}")
                     else:
                         st.warning("⚠️ No changes detected.")
@@ -621,20 +619,27 @@ def show_day_verification_interface(db_service, intern_id, subject):
                     
                     if changes:
                         with st.spinner("Saving changes and verifying..."):
-                            success = db_service.verify_question(
+                            success, message = db_service.verify_question(
                                 str(question['_id']), 
                                 intern_id, 
                                 "modified",
-                                changes
+                                changes,
+                                subject=subject,
+                                idempotency_key=get_submission_key("modify", question['_id'])
                             )
                             if success:
                                 st.success("✅ Question modified and verified!")
+                                working_set.invalidate()
                                 st.session_state[session_key] = min(st.session_state[session_key] + 1, len(questions))
                                 if edit_mode_key in st.session_state:
                                     del st.session_state[edit_mode_key]
                                 st.rerun()
                             else:
-                                st.error("❌ Verification failed")
+                                rotate_submission_key("modify", question['_id'])
+                                if "already verified" in message:
+                                    # Verified elsewhere since this view loaded; reload so it stops showing as open
+                                    working_set.invalidate()
+                                st.error(f"❌ {message}")
                     else:
                         st.warning("⚠️ No changes detected.")
         
@@ -648,7 +653,8 @@ def show_day_verification_interface(db_service, intern_id, subject):
         col1, col2, col3 = st.columns(3)
         
         reverify_mode = st.session_state.get('reverify_mode', False)
-        already_processed = db_service.is_question_verified(str(question['_id']), subject)
+        # Verified state comes from the loaded question; verify_question itself rejects races
+        already_processed = bool(question.get('Q_id'))
         
         if already_processed and not reverify_mode:
             st.info("✅ This question is already verified")
@@ -660,43 +666,57 @@ def show_day_verification_interface(db_service, intern_id, subject):
                         success, message = db_service.reverify_question(
                             str(question['_id']), 
                             intern_id, 
-                            "reverified"
+                            "reverified",
+                            subject=subject,
+                            idempotency_key=get_submission_key("reverify", question['_id'])
                         )
                         if success:
                             st.success("🔄 Question re-verified!")
+                            working_set.invalidate()
                             st.session_state[session_key] = min(st.session_state[session_key] + 1, len(questions))
                             st.rerun()
                         else:
+                            rotate_submission_key("reverify", question['_id'])
                             st.error(f"❌ {message}")
             else:
                 if st.button("✅ Verify", type="primary", key=f"verify_{question['_id']}", disabled=already_processed):
                     with st.spinner("Verifying question..."):
-                        success = db_service.verify_question(
+                        success, message = db_service.verify_question(
                             str(question['_id']), 
                             intern_id, 
-                            "verified"
+                            "verified",
+                            subject=subject,
+                            idempotency_key=get_submission_key("verify", question['_id'])
                         )
                         if success:
                             st.success("✅ Question verified!")
+                            working_set.invalidate()
                             st.session_state[session_key] = min(st.session_state[session_key] + 1, len(questions))
                             st.rerun()
                         else:
-                            st.error("❌ Verification failed")
+                            rotate_submission_key("verify", question['_id'])
+                            if "already verified" in message:
+                                # Verified elsewhere since this view loaded; reload so it stops showing as open
+                                working_set.invalidate()
+                            st.error(f"❌ {message}")
         
         with col2:
             if reverify_mode:
                 if st.button("📝 Re-modify", key=f"remodify_{question['_id']}"):
                     st.session_state[edit_mode_key] = True
+                    reset_submission_keys()
                     st.rerun()
             else:
                 if st.button("📝 Modify & Verify", key=f"modify_{question['_id']}", disabled=already_processed):
                     st.session_state[edit_mode_key] = True
+                    reset_submission_keys()
                     st.rerun()
         
         with col3:
             if st.button(f"🔙 Back to Days", key=f"back_{subject}"):
                 if 'selected_day' in st.session_state:
                     del st.session_state['selected_day']
+                reset_submission_keys()
                 st.rerun()
     
     # Compact navigation (only show in normal verification mode)
@@ -705,14 +725,32 @@ def show_day_verification_interface(db_service, intern_id, subject):
         with col1:
             if st.button("⬅️ Prev", disabled=st.session_state[session_key] <= 1):
                 st.session_state[session_key] = max(1, st.session_state[session_key] - 1)
+                reset_submission_keys()
                 st.rerun()
         with col2:
             st.write(f"Question {st.session_state[session_key]} of {len(questions)}")
         with col3:
             if st.button("➡️ Next", disabled=st.session_state[session_key] >= len(questions)):
                 st.session_state[session_key] = min(st.session_state[session_key] + 1, len(questions))
+                reset_submission_keys()
                 st.rerun()
 
+def get_submission_key(kind, question_id):
+    """Idempotency key for a submission, stable across reruns and double clicks."""
+    state_key = f"submit_key_{kind}_{question_id}"
+    if state_key not in st.session_state:
+        st.session_state[state_key] = str(uuid.uuid4())
+    return st.session_state[state_key]
+
+def rotate_submission_key(kind, question_id):
+    """Use a new key after a failed submission so a corrected retry isn't a replay."""
+    st.session_state.pop(f"submit_key_{kind}_{question_id}", None)
+
+def reset_submission_keys():
+    """Start fresh submissions once the intern navigates or opens the editor."""
+    for state_key in [k for k in st.session_state.keys() if str(k).startswith("submit_key_")]:
+        del st.session_state[state_key]
+
 def show_subject_progress(db_service, intern_id, subject):
     """Show detailed progress for a subject."""
     st.markdown(f"#### 📊 {subject.title()} Progress")